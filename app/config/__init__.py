@@ -1,11 +1,14 @@
 import logging
 from app.config.config import get_settings
+from app.config.logging_config import configure_logging
 
-# Configuración global del logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+settings = get_settings()
+
+# Configuración global del logging: cola con hilo propio y salida JSON
+configure_logging(settings)
 logger = logging.getLogger("ThreadFit")
 
-settings = get_settings()
\ No newline at end of file
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger hijo de `ThreadFit` (p. ej. `ThreadFit.ws`), muestreable por separado."""
+    return logger.getChild(name)
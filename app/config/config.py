@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict, PostgresDsn, AnyHttpUrl
-from typing import List
+from pydantic import ConfigDict, Field, PostgresDsn, AnyHttpUrl
+from typing import Dict, List, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -24,6 +24,153 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_WARMUP: int = 5  # conexiones abiertas y calentadas antes de aceptar tráfico
+    DB_POOL_WARMUP_TIMEOUT: float = 15.0
+    POOL_WAIT_DECAY_SECONDS: float = 5.0  # olvido de la espera media de checkout sin tráfico
+
+    # Control de admisión: límites de peticiones en curso por clase de ruta y
+    # presión del pool a partir de la cual se rechaza cada clase (503).
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_INFLIGHT_READ: int = 512
+    ADMISSION_MAX_INFLIGHT_WRITE: int = 128
+    ADMISSION_MAX_INFLIGHT_EXPORT: int = 4
+    ADMISSION_MAX_INFLIGHT_GENERATION: int = 4
+    ADMISSION_MAX_POOL_WAITERS: int = 50  # esperas de checkout que cuentan como saturación
+    ADMISSION_MAX_POOL_WAIT_SECONDS: float = 1.0  # espera media que cuenta como saturación
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+
+    # statement_timeout por clase de ruta (ms, SET LOCAL por transacción); 0 = sin límite
+    STATEMENT_TIMEOUT_READ_MS: int = 5_000
+    STATEMENT_TIMEOUT_WRITE_MS: int = 10_000
+    STATEMENT_TIMEOUT_EXPORT_MS: int = 60_000
+    STATEMENT_TIMEOUT_GENERATION_MS: int = 0  # la generación sintética inserta grafos enteros
+    CANCEL_ON_DISCONNECT: bool = True  # cancela los GET cuyo cliente se ha desconectado
+
+    # Límite de peticiones (token bucket): tokens/s y ráfaga por usuario
+    # autenticado o, sin sesión válida, por IP. Con REDIS_URL es global al clúster.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USER_RATE: float = 20.0
+    RATE_LIMIT_USER_BURST: int = 200
+    RATE_LIMIT_IP_RATE: float = 5.0
+    RATE_LIMIT_IP_BURST: int = 100
+    RATE_LIMIT_COST_READ: int = 1
+    RATE_LIMIT_COST_WRITE: int = 2
+    RATE_LIMIT_COST_EXPORT: int = 20
+    RATE_LIMIT_COST_GENERATION: int = 50
+    RATE_LIMIT_MAX_KEYS: int = 100_000  # claves por worker en el limitador en memoria
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # usar X-Forwarded-For (solo detrás de un proxy propio)
+
+    # Apagado: espera máxima a que las generaciones en curso terminen su lote
+    SHUTDOWN_DRAIN_SECONDS: float = 20.0
+
+    # Servidor (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 = según la cuota de CPU del cgroup
+    SERVER_PRELOAD: bool = True
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_MAX_REQUESTS: int = 10_000  # reciclado de workers; 0 = desactivado
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_ACCESS_LOG: bool = False
+    SERVER_SSL_CERTFILE: Optional[str] = None  # mejor terminar TLS en el ingress
+    SERVER_SSL_KEYFILE: Optional[str] = None
+
+    # Logging (cola no bloqueante con hilo propio)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # p. ej. {"ThreadFit.ws": 0.1}: fracción emitida por debajo de WARNING
+    LOG_RATE_LIMIT_PER_SECOND: float = 100.0  # registros/s por logger por debajo de ERROR; 0 = sin límite
+    LOG_RATE_LIMIT_BURST: int = 500
+    LOG_QUEUE_SIZE: int = 10_000  # con la cola llena se descartan registros en vez de bloquear
+
+    # Monitor del bucle de eventos (retraso y bloqueos con pila)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_MONITOR_WINDOW: int = 600  # muestras de retraso conservadas (60 s con el intervalo por defecto)
+    LOOP_SLOW_CALLBACK_SECONDS: float = 0.1  # bloqueo a partir del cual se registra con ruta y pila
+    LOOP_MONITOR_MAX_EVENTS: int = 50
+    LOOP_MONITOR_STACK_DEPTH: int = 30
+
+    # Hash de contraseñas (pool de hilos fuera del bucle de eventos). Al cambiar
+    # algoritmo o parámetros, cada hash se recalcula en el siguiente login correcto.
+    PASSWORD_HASH_ALGORITHM: Literal["argon2", "bcrypt"] = "argon2"
+    PASSWORD_ARGON2_TIME_COST: int = Field(3, ge=1)
+    PASSWORD_ARGON2_MEMORY_KIB: int = Field(65536, ge=8)
+    PASSWORD_ARGON2_PARALLELISM: int = Field(4, ge=1)
+    PASSWORD_BCRYPT_ROUNDS: int = Field(12, ge=4, le=31)
+    PASSWORD_HASH_WORKERS: int = 0  # hilos por worker; 0 = uno por CPU
+    PASSWORD_HASH_MAX_PENDING: int = 64  # hashes en cola o en curso por worker; por encima, 503
+
+    # Trazas OpenTelemetry (opcional: requiere opentelemetry-sdk)
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "threadfit"
+    TRACING_HEAD_SAMPLE_RATIO: float = Field(0.1, ge=0, le=1)  # trazas grabadas al empezar
+    TRACING_TAIL_LATENCY_MS: float = 500.0  # las trazas grabadas más lentas se exportan siempre
+    TRACING_TAIL_KEEP_RATIO: float = Field(0.1, ge=0, le=1)  # fracción exportada del resto (rápidas y sin error)
+    TRACING_EXPORTER: Literal["file", "otlp"] = "file"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: Optional[str] = None  # p. ej. http://otel-collector:4318/v1/traces
+    TRACING_MAX_SPANS_PER_TRACE: int = 2000  # una generación larga envía un mensaje por fila
+    TRACING_MAX_STATEMENT_CHARS: int = 2000
+
+    # Almacén compartido opcional (idempotencia, límites); sin él se usa memoria por worker
+    REDIS_URL: Optional[str] = None
+
+    # Idempotency-Key en endpoints de escritura
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_MAX_KEYS: int = 100_000  # claves por worker en el almacén en memoria
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # reserva de una petición en curso
+
+    # Timeline: autores con más seguidores no hacen fan-out en escritura
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10_000
+    TIMELINE_BACKFILL_POSTS: int = 20
+
+    # Creación masiva de posts
+    POSTS_BULK_MAX_ITEMS: int = 1000  # elementos por petición JSON
+    POSTS_BULK_MAX_STREAM_ITEMS: int = 100_000  # líneas por petición NDJSON
+    POSTS_BULK_MAX_BODY_BYTES: int = 8 * 1024 * 1024  # cuerpo JSON completo o una línea NDJSON
+    POSTS_BULK_CHUNK: int = 500  # filas por INSERT
+
+    # Comentarios en hilo
+    COMMENTS_MAX_DEPTH: int = 32
+    COMMENTS_MAX_REPLIES_PER_NODE: int = 50  # tope de `replies_limit` al listar un hilo
+
+    # Caché de posts individuales (GET /posts/{post_id} y /posts/batch)
+    POST_CACHE_TTL_SECONDS: float = 30.0
+    POST_CACHE_MAX_ENTRIES: int = 10_000
+    POSTS_BATCH_MAX_IDS: int = 100
+
+    # Borrado de posts
+    POST_PURGE_CHUNK: int = 5000  # filas hijas borradas por transacción
+    POST_PURGE_SWEEP_SECONDS: float = 600.0
+
+    # Contadores de visitas (escritura diferida)
+    VIEW_FLUSH_SECONDS: float = 5.0
+    VIEW_FLUSH_MAX_PENDING: int = 10_000  # posts distintos pendientes que fuerzan un flush
+    VIEW_MAX_PENDING: int = 100_000  # por encima, se descartan visitas a posts nuevos (base de datos caída)
+
+    # Tendencias
+    TRENDING_HALF_LIFE_HOURS: float = 6.0
+    TRENDING_LIKE_WEIGHT: float = 1.0
+    TRENDING_COMMENT_WEIGHT: float = 3.0
+    TRENDING_REFRESH_SECONDS: float = 30.0  # recálculo del top-N en caché
+    TRENDING_DECAY_SECONDS: float = 300.0  # reajuste y poda de la tabla de puntuaciones
+    TRENDING_MIN_SCORE: float = 0.01
+    TRENDING_TOP_N: int = 100
+
+    # Búsqueda de texto completo (configuración regconfig de PostgreSQL)
+    SEARCH_TEXT_CONFIG: str = Field("simple", pattern=r"^[a-z_]+$")
+
+    # Generación sintética
+    SYNTHETIC_PROCESS_WORKERS: int = 0  # 0 = un proceso por CPU
+    SYNTHETIC_INSERT_CHUNK: int = 5000  # filas por INSERT multi-fila
 
     # Configuración de carga desde `.env`
     model_config = ConfigDict(
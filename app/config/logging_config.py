@@ -0,0 +1,156 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import orjson
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Atributos propios de LogRecord; el resto son campos `extra=` y van al JSON.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos `extra=` como claves propias."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros por debajo de WARNING de los
+    loggers configurados (y sus hijos): `{"ThreadFit.ws": 0.1}` emite el 10 %.
+    """
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            probe = name
+            while probe not in self.rates and "." in probe:
+                probe = probe.rsplit(".", 1)[0]
+            rate = self._resolved[name] = self.rates.get(probe, 1.0)
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket por logger para los registros por debajo de ERROR. Los
+    descartados se cuentan y el siguiente registro emitido del mismo logger
+    lleva `suppressed` con cuántos se perdieron.
+    """
+
+    def __init__(self, per_second: float, burst: int) -> None:
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst
+        self._buckets: Dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get(record.name)
+        if bucket is None:
+            bucket = self._buckets[record.name] = [float(self.burst), now, 0]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            return False
+        bucket[0] = tokens - 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola el registro sin formatearlo: el mensaje (`msg % args`), el JSON y
+    la escritura en stdout se hacen en el hilo del listener, fuera del bucle
+    de eventos. Con la cola llena el registro se descarta en vez de bloquear.
+    Los argumentos se formatean más tarde: no se deben mutar tras loguearlos.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(settings) -> None:
+    """
+    Sustituye los handlers del logger raíz por una cola atendida desde un
+    hilo propio. Los filtros de muestreo y límite se aplican antes de
+    encolar, así que un registro descartado apenas cuesta nada.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    if settings.LOG_SAMPLE_RATES:
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    if settings.LOG_RATE_LIMIT_PER_SECOND > 0:
+        handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT_PER_SECOND, settings.LOG_RATE_LIMIT_BURST))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    if hasattr(os, "register_at_fork"):
+        # Con gunicorn --preload los workers nacen por fork sin el hilo del
+        # listener (y quizá con el lock de la cola tomado): cola e hilo nuevos.
+        def _restart_in_child() -> None:
+            handler.queue = _listener.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+            _listener._thread = None
+            _listener.start()
+
+        os.register_at_fork(after_in_child=_restart_in_child)
@@ -1,2 +1,2 @@
-from .main_db import Base, engine, async_session, get_db_session
-from .models import User, Post, Comment, Like, Batch
\ No newline at end of file
+from .main_db import Base, engine, async_session, get_db_session, pool_stats, statement_timeout_ms
+from .models import User, Post, Comment, Like, Batch, Follow, TimelineEntry, PostScore
\ No newline at end of file
@@ -1,28 +1,94 @@
+import math
+import time
+from contextvars import ContextVar
 from typing import AsyncGenerator
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import get_settings, logger
 
 settings = get_settings()
 
+
+class PoolStats:
+    """
+    Presión del pool de conexiones en este worker: peticiones esperando un
+    checkout y media móvil del tiempo de espera, que decae con
+    `POOL_WAIT_DECAY_SECONDS` cuando no hay checkouts nuevos.
+    """
+
+    def __init__(self) -> None:
+        self.waiting = 0
+        self._wait_avg = 0.0
+        self._updated = time.monotonic()
+
+    def observe(self, seconds: float) -> None:
+        self._wait_avg = 0.8 * self.wait_seconds + 0.2 * seconds
+        self._updated = time.monotonic()
+
+    @property
+    def wait_seconds(self) -> float:
+        idle = time.monotonic() - self._updated
+        return self._wait_avg * math.exp(-idle / settings.POOL_WAIT_DECAY_SECONDS)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool de SQLAlchemy que mide cuánto espera cada checkout."""
+
+    def _do_get(self):
+        pool_stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.waiting -= 1
+            pool_stats.observe(time.perf_counter() - start)
+
 # Permite configurar el log de SQL por variable de entorno
 engine = create_async_engine(
     str(settings.DATABASE_URL),
     echo=getattr(settings, "DB_ECHO", False),
     future=True,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
 )
 
+# Presupuesto de `statement_timeout` (ms) de la petición en curso; 0 = sin límite.
+# Lo fija el middleware de presupuestos según la clase de ruta.
+statement_timeout_ms: ContextVar[int] = ContextVar("statement_timeout_ms", default=0)
+
+
+class BudgetedSession(Session):
+    """Sesión que aplica el `statement_timeout` de la petición a cada transacción."""
+
+
+@event.listens_for(BudgetedSession, "after_begin")
+def _apply_statement_timeout(session, transaction, connection) -> None:
+    timeout = statement_timeout_ms.get()
+    if timeout:
+        # SET LOCAL dura lo que la transacción: la conexión vuelve limpia al pool.
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
 # Sessionmaker asíncrono para SQLAlchemy
 async_session = async_sessionmaker(
     engine,
     expire_on_commit=False,
     class_=AsyncSession,
+    sync_session_class=BudgetedSession,
 )
 
 # Declarative base para los modelos ORM
 Base = declarative_base()
 
-__all__ = ["engine", "async_session", "Base", "get_db_session"]
+__all__ = ["engine", "async_session", "Base", "get_db_session", "pool_stats", "statement_timeout_ms"]
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -1,16 +1,22 @@
 import uuid
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, UniqueConstraint, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, Computed, Float, Index, Integer, String, Text, Boolean, DateTime, ForeignKey, UniqueConstraint, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTableUUID
+from app.config import settings
 from app.db import Base
 
+# Configuración de búsqueda de texto de PostgreSQL usada en las columnas tsvector.
+TS_CONFIG = settings.SEARCH_TEXT_CONFIG
+
 class User(SQLAlchemyBaseUserTableUUID, Base):
     """
     Modelo de usuario para autenticación y relaciones.
     batch_id solo se asigna a usuarios ficticios creados por lote.
     """
     __tablename__ = "users"
+    # Contador mantenido al seguir/dejar de seguir; decide si un autor usa fan-out en escritura.
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
     batches = relationship(
         "Batch",
         back_populates="user",
@@ -30,11 +36,31 @@ class Post(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     title = Column(String(200), nullable=False, index=True)
     content = Column(Text, nullable=False)
-    comments = relationship("Comment", back_populates="post")
+    # El borrado de hijos lo hace la base de datos (ON DELETE CASCADE): passive_deletes
+    # evita que SQLAlchemy cargue todos los comentarios antes de borrar el post.
+    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", passive_deletes=True)
     user = relationship("User", backref="posts")
     is_published = Column(Boolean, default=False, nullable=False)
+    views = Column(BigInteger, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True),server_default=func.now(),nullable=False,)
     updated_at = Column(DateTime(timezone=True),server_default=func.now(),onupdate=func.now(),nullable=False,)
+    # Borrado lógico: el post deja de mostrarse y sus hijos se purgan en segundo plano.
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Vector de búsqueda generado por PostgreSQL: el título pesa más que el contenido.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{TS_CONFIG}', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+
+    __table_args__ = (
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_posts_user_created", "user_id", "created_at"),
+        Index("ix_posts_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
 
     def __repr__(self):
         return f"<Post id={self.id} title={self.title}>"
@@ -47,8 +73,28 @@ class Comment(Base):
     created_at = Column(DateTime(timezone=True),server_default=func.now(),nullable=False)
     user_id = Column(UUID(as_uuid=True),ForeignKey("users.id", ondelete="CASCADE"),nullable=False,)
     post_id = Column(UUID(as_uuid=True),ForeignKey("posts.id", ondelete="CASCADE"),nullable=False,)
+    # Hilos: respuesta a otro comentario, con ruta materializada (ver comments_service).
+    parent_id = Column(UUID(as_uuid=True), ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
+    path = Column(Text(collation="C"), nullable=False)
+    depth = Column(Integer, nullable=False, server_default="0")
+    reply_count = Column(Integer, nullable=False, server_default="0")
     user = relationship("User", backref="comments")
     post = relationship("Post", back_populates="comments")
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TS_CONFIG}', coalesce(content, ''))", persisted=True),
+    ))
+
+    __table_args__ = (
+        Index("ix_comments_search_vector", "search_vector", postgresql_using="gin"),
+        # Hilo completo o subárbol como rango sobre la ruta; también sirve al
+        # ON DELETE CASCADE desde posts.
+        Index("ix_comments_post_path", "post_id", "path"),
+        # Un nivel del hilo (raíces o respuestas directas) paginado por ruta.
+        Index("ix_comments_post_parent_path", "post_id", "parent_id", "path"),
+        # ON DELETE CASCADE desde el comentario padre.
+        Index("ix_comments_parent", "parent_id"),
+    )
 
     def __repr__(self):
         return f"<Comment id={self.id}>"
@@ -57,7 +103,7 @@ class Like(Base):
     __tablename__ = "likes"
 
     id = Column(UUID(as_uuid=True),primary_key=True,default=uuid.uuid4,unique=True,nullable=False,)
-    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id"), nullable=False)
+    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), nullable=False)
     created_at = Column(DateTime(timezone=True),server_default=func.now(),nullable=False,)
     batch_id = Column(UUID(as_uuid=True), nullable=True)
@@ -75,4 +121,52 @@ class Batch(Base):
     user = relationship("User", back_populates="batches", foreign_keys=[user_id])
 
     def __repr__(self):
-        return f"<Batch id={self.id}>"
\ No newline at end of file
+        return f"<Batch id={self.id}>"
+
+class Follow(Base):
+    """
+    Relación de seguimiento entre usuarios.
+    """
+    __tablename__ = "follows"
+
+    follower_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    followee_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_follows_followee", "followee_id", "follower_id"),)
+
+    def __repr__(self):
+        return f"<Follow {self.follower_id} -> {self.followee_id}>"
+
+class TimelineEntry(Base):
+    """
+    Entrada materializada del timeline de un usuario (fan-out en escritura).
+    La clave primaria (user_id, created_at, post_id) permite leer el timeline
+    con un único recorrido de rango sobre el índice.
+    """
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(UUID(as_uuid=True), nullable=False)
+
+    def __repr__(self):
+        return f"<TimelineEntry user={self.user_id} post={self.post_id}>"
+
+class PostScore(Base):
+    """
+    Puntuación de tendencia de un post, con decaimiento temporal.
+    `score` es el valor a fecha `updated_at`; se actualiza de forma incremental
+    con cada interacción y se reajusta periódicamente.
+    """
+    __tablename__ = "post_scores"
+
+    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_post_scores_score", "score"),)
+
+    def __repr__(self):
+        return f"<PostScore post={self.post_id} score={self.score}>"
@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, AsyncIterable, Callable, Dict, Final
+from typing import Any, AsyncIterable, Callable, Dict, Final, List, Tuple
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
 from fastapi.websockets import WebSocketState
-from jose import JWTError, jwt
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -13,21 +12,25 @@ from sqlalchemy import select
 from app.db.main_db import get_db_session
 from app.db.models import User
 from app.routes.schemas import WSMessage
-from app.config import logger, get_settings
+from app.config import get_logger, get_settings
+from app.services.auth_service import decode_access_token
+from app.services.lifecycle_service import drain
+from app.services.scheduler_service import GenerationScheduler
+from app.services.tracing_service import root_span, span
 from app.services.synthetic_service import (
     create_batch,
-    create_fake_user,
-    create_fake_post,
-    create_fake_comment,
+    create_fake_users,
+    create_fake_posts,
+    create_fake_comments,
+    generate_rows,
 )
 from app.db.main_db import async_session
 import uuid
-import asyncio
 
 settings = get_settings()
+logger = get_logger("ws")
 
 MAX_WS_PER_USER: Final[int] = 5
-JWT_ALG: Final[str] = settings.JWT_ALGORITHM
 COOKIE_NAME: Final[str] = settings.COOKIE_NAME
 
 websocket_router = APIRouter(prefix="/ws", tags=["websockets-generation"])
@@ -62,32 +65,42 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
-# Mapeo de acciones a funciones generadoras asíncronas
-ActionHandler = Callable[[Dict[str, Any], float], AsyncIterable[Dict[str, Any]]]
+# Mapeo de acciones a funciones generadoras asíncronas.
+# Cada generador produce lotes de elementos junto con las estadísticas de ritmo.
+ActionHandler = Callable[
+    [Dict[str, Any], GenerationScheduler],
+    AsyncIterable[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+]
 ACTION_MAP: Dict[str, ActionHandler] = {
-    "generate_users": lambda payload, speed: ws_generate_items(
+    "generate_users": lambda payload, scheduler: ws_generate_items(
         amount=payload.get("amount", 1),
-        create_fn=create_fake_user,
+        create_many_fn=create_fake_users,
+        kind="user",
+        seed=payload.get("seed"),
         batch_id=payload.get("batch_id") or str(uuid.uuid4()),
         batch_check_user_id=payload.get("user_id"),
-        speed=speed,
+        scheduler=scheduler,
     ),
-    "generate_posts": lambda payload, speed: ws_generate_items(
+    "generate_posts": lambda payload, scheduler: ws_generate_items(
         amount=payload.get("amount", 1),
-        create_fn=create_fake_post,
+        create_many_fn=create_fake_posts,
+        kind="post",
+        seed=payload.get("seed"),
         user_id=payload.get("user_id"),
         batch_id=payload.get("batch_id") or str(uuid.uuid4()),
         batch_check_user_id=payload.get("user_id"),
-        speed=speed,
+        scheduler=scheduler,
     ),
-    "generate_comments": lambda payload, speed: ws_generate_items(
+    "generate_comments": lambda payload, scheduler: ws_generate_items(
         amount=payload.get("amount", 1),
-        create_fn=create_fake_comment,
+        create_many_fn=create_fake_comments,
+        kind="comment",
+        seed=payload.get("seed"),
         user_id=payload.get("user_id"),
         post_id=payload.get("post_id"),
         batch_id=payload.get("batch_id") or str(uuid.uuid4()),
         batch_check_user_id=payload.get("user_id"),
-        speed=speed,
+        scheduler=scheduler,
     ),
 }
 
@@ -99,23 +112,29 @@ async def websocket_generate(
     """
     Endpoint principal para generación sintética vía WebSocket.
     Autentica al usuario, gestiona el ciclo de vida y enruta acciones.
-    Espera mensajes con formato: {"action": str, "payload": dict, "speed_multiplier": float}
+    Espera mensajes con formato:
+    {"action": str, "payload": dict, "speed_multiplier": float,
+     "rows_per_second": float | None, "unthrottled": bool, "batch_size": int}
     """
     user = None
-    logger.info("Nueva conexión WebSocket iniciada.")
+    logger.debug("Nueva conexión WebSocket iniciada.")
     try:
+        if drain.draining:
+            # El servidor se está cerrando: el cliente debe reconectar a otra instancia.
+            await ws.close(code=status.WS_1012_SERVICE_RESTART)
+            return
         user = await _authenticate_ws(ws, db)
-        logger.info(f"Usuario autenticado: {user.id}")
+        logger.debug("Usuario autenticado: %s", user.id)
         await manager.connect(ws, user.id)
-        logger.info(f"Conexión WebSocket establecida para el usuario {user.id}")
+        logger.info("Conexión WebSocket establecida para el usuario %s", user.id)
 
         while True:
             try:
                 raw = await ws.receive_json()
-                logger.info(f"Mensaje recibido: {raw}")
+                logger.debug("Mensaje recibido: %s", raw)
                 msg = WSMessage(**raw)
             except (ValidationError, ValueError) as ve:
-                logger.error(f"Error al validar el mensaje: {ve}")
+                logger.warning("Error al validar el mensaje: %s", ve)
                 await ws.send_json({"type": "error", "detail": str(ve)})
                 continue
             except WebSocketDisconnect:
@@ -124,13 +143,20 @@ async def websocket_generate(
 
             handler = ACTION_MAP.get(msg.action)
             if not handler:
-                logger.warning(f"Acción desconocida: {msg.action}")
+                logger.warning("Acción desconocida: %s", msg.action)
                 await ws.send_json(
                     {"type": "error", "detail": f"Acción desconocida: {msg.action}"}
                 )
                 continue
 
-            await _run_generation(ws, handler, msg)
+            if drain.draining:
+                await ws.close(code=status.WS_1012_SERVICE_RESTART)
+                break
+            async with drain.track(), root_span(f"WS {msg.action}", **{"user.id": str(user.id)}):
+                finished = await _run_generation(ws, handler, msg)
+            if not finished:
+                await ws.close(code=status.WS_1012_SERVICE_RESTART)
+                break
     except WebSocketDisconnect:
         logger.info("WebSocket desconectado.")
     except Exception as e:
@@ -140,40 +166,64 @@ async def websocket_generate(
     finally:
         if user:
             manager.disconnect(user.id)
-            logger.info(f"Conexión WebSocket cerrada para el usuario {user.id}")
+            logger.info("Conexión WebSocket cerrada para el usuario %s", user.id)
 
 async def _run_generation(
     ws: WebSocket,
     handler: ActionHandler,
     msg: WSMessage,
-) -> None:
+) -> bool:
     """
     Ejecuta la función generadora asociada a la acción y envía mensajes de progreso.
+    Si el servidor empieza a cerrarse, termina el lote en curso, envía un
+    `checkpoint` con lo que falta por generar y devuelve False.
     """
     total = 0
+    scheduler = GenerationScheduler(msg.target_rate(), msg.batch_size)
     try:
-        async for item in handler(msg.payload, msg.speed_multiplier):
-            total += 1
+        async for items, stats in handler(msg.payload, scheduler):
             if ws.application_state == WebSocketState.DISCONNECTED:
                 break
+            for item in items:
+                total += 1
+                with span("ws.send"):
+                    await ws.send_json(
+                        {
+                            "type": "progress",
+                            "action": msg.action,
+                            "payload": item,
+                            "count": total,
+                            **stats,
+                        }
+                    )
+            remaining = max(int(msg.payload.get("amount", 1)) - total, 0)
+            if drain.draining and remaining:
+                await ws.send_json(
+                    {
+                        "type": "checkpoint",
+                        "action": msg.action,
+                        "total": total,
+                        "remaining": remaining,
+                        "detail": "Servidor reiniciándose; reenvía la acción con `remaining` como cantidad.",
+                    }
+                )
+                return False
+        if ws.application_state != WebSocketState.DISCONNECTED:
             await ws.send_json(
                 {
-                    "type": "progress",
+                    "type": "completed",
                     "action": msg.action,
-                    "payload": item,
-                    "count": total,
+                    "total": total,
+                    **scheduler.progress(),
                 }
             )
-        if ws.application_state != WebSocketState.DISCONNECTED:
-            await ws.send_json(
-                {"type": "completed", "action": msg.action, "total": total}
-            )
     except Exception as exc:
         logger.exception("Error durante la generación '%s'", msg.action, exc_info=True)
         if ws.application_state != WebSocketState.DISCONNECTED:
             await ws.send_json(
                 {"type": "error", "detail": str(exc), "action": msg.action}
             )
+    return True
 
 async def _authenticate_ws(ws: WebSocket, db: AsyncSession) -> User:
     """
@@ -187,18 +237,9 @@ async def _authenticate_ws(ws: WebSocket, db: AsyncSession) -> User:
         raise WebSocketDisconnect()
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[JWT_ALG],
-            audience="fastapi-users:auth"
-        )
-        user_id = payload.get("sub")
-        if not user_id:
-            raise JWTError("El token no contiene el campo 'sub'.")
-        user_id = UUID(user_id)
-    except (JWTError, ValueError) as e:
-        logger.error(f"Error al decodificar el token JWT: {e}")
+        user_id = decode_access_token(token)
+    except ValueError as e:
+        logger.warning("Error al decodificar el token JWT: %s", e)
         await ws.close(code=status.WS_1008_POLICY_VIOLATION)
         raise WebSocketDisconnect()
 
@@ -207,26 +248,39 @@ async def _authenticate_ws(ws: WebSocket, db: AsyncSession) -> User:
         .scalar_one_or_none()
     )
     if not user:
-        logger.warning(f"Usuario no encontrado para el ID: {user_id}")
+        logger.warning("Usuario no encontrado para el ID: %s", user_id)
         await ws.close(code=status.WS_1008_POLICY_VIOLATION)
         raise WebSocketDisconnect()
     return user
 
 async def ws_generate_items(
     amount: int,
-    create_fn,
+    create_many_fn,
     *args,
-    speed: float = 1.0,
+    kind: str,
+    scheduler: GenerationScheduler,
+    seed: int = None,
     batch_check_user_id: str = None,
     batch_id: str = None,
     **kwargs
 ):
+    """
+    Genera `amount` elementos por lotes al ritmo que marca el planificador.
+    Cada lote se crea en su propia sesión y se confirma con un único commit.
+    """
     if batch_check_user_id and not batch_id:
         batch_id = str(uuid.uuid4())
         async with async_session() as db:
             await create_batch(db, batch_check_user_id)
-    for _ in range(amount):
-        async with async_session() as db:
-            item = await create_fn(db, *args, **kwargs)
-        yield item
-        await asyncio.sleep(max(0.01, 1.0 / speed))
+    with span("generation.rows", kind=kind, amount=amount):
+        rows = await generate_rows(kind, amount, seed)
+    done = 0
+    while done < amount:
+        size = await scheduler.acquire(amount - done)
+        # El span se cierra antes del `yield`: no debe quedar activo mientras se envía el lote.
+        with span("generation.chunk", kind=kind, offset=done, size=size):
+            async with async_session() as db:
+                items = await create_many_fn(db, *args, rows=rows[done:done + size], **kwargs)
+        done += size
+        scheduler.record(size)
+        yield items, scheduler.progress()
@@ -6,10 +6,12 @@ from sqlalchemy import select, join
 
 from app.db import Batch, User, Post, Comment,get_db_session
 from app.services.auth_service import current_active_user
-from app.config import logger
+from app.config import get_logger
 from app.services.data_collection_service import csv_response, pdf_response, to_dict_comment, to_dict_post, to_dict_user
+from app.services.serialization_service import FastJSONResponse
 
 data_router = APIRouter(prefix="/data", tags=["Data Collection"])
+logger = get_logger("data")
 
 @data_router.get("/users", summary="Obtener usuario dueño del batch")
 async def get_users(
@@ -18,15 +20,15 @@ async def get_users(
     session: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(current_active_user),
 ):
-    logger.info(f"Obteniendo usuario para batch_id: {batch_id} en formato: {format}")
+    logger.debug("Obteniendo usuario para batch_id: %s en formato: %s", batch_id, format)
     batch = await session.get(Batch, batch_id)
     if not batch or batch.user_id != current_user.id:
-        logger.info("Batch no encontrado o no pertenece al usuario autenticado.")
+        logger.debug("Batch no encontrado o no pertenece al usuario autenticado.")
         return {"data": []}
 
     user = await session.get(User, batch.user_id)
     if not user:
-        logger.info("Usuario no encontrado para el batch.")
+        logger.debug("Usuario no encontrado para el batch.")
         return {"data": []}
 
     data = [to_dict_user(user)]
@@ -50,11 +52,12 @@ async def get_posts(
         return {"data": []}
     # Busca los posts del usuario que creó el batch
     query = await session.execute(
-        select(Post).where(Post.user_id == batch.user_id)
+        select(Post.id, Post.title, Post.content, Post.is_published, Post.user_id)
+        .where(Post.deleted_at.is_(None))
+        .where(Post.user_id == batch.user_id)
     )
-    posts = query.scalars().all()
-    data = [to_dict_post(p) for p in posts]
-    return {"data": data}
+    data = [to_dict_post(p) for p in query.all()]
+    return FastJSONResponse({"data": data})
 
 @data_router.get("/comments", summary="Obtener comentarios generados")
 async def get_comments(
@@ -73,18 +76,17 @@ async def get_comments(
     if not post_ids:
         return {"data": []}
     comments_query = await session.execute(
-        select(Comment).where(Comment.post_id.in_(post_ids))
+        select(Comment.id, Comment.content, Comment.post_id, Comment.user_id)
+        .where(Comment.post_id.in_(post_ids))
     )
-    comments = comments_query.scalars().all()
-    data = [to_dict_comment(c) for c in comments]
-    return {"data": data}
+    data = [to_dict_comment(c) for c in comments_query.all()]
+    return FastJSONResponse({"data": data})
 
 @data_router.get("/batches", summary="Obtener todos los batch_id del usuario autenticado")
 async def get_batches(
     session: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(current_active_user),
 ):
-    logger.info(f"Obteniendo batch_ids para el usuario autenticado: {current_user.id}")
 
     # Corrige el select para obtener los batch_id correctos
     user_batches = await session.execute(
@@ -101,6 +103,6 @@ async def get_batches(
     all_batches = set(
         filter(None, user_batches.scalars().all() + post_batches.scalars().all() + comment_batches.scalars().all())
     )
-    logger.info(f"Todos los batch_ids combinados: {all_batches}")
+    logger.debug("Batches del usuario %s: %s", current_user.id, len(all_batches))
 
     return {"batches": list(all_batches)}
\ No newline at end of file
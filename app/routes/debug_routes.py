@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+
+from app.routes.schemas import LoopMonitorResponse
+from app.services.auth_service import current_superuser
+from app.services.loop_monitor_service import loop_monitor
+from app.services.serialization_service import FastJSONResponse
+
+debug_router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+    dependencies=[Depends(current_superuser)],
+)
+
+
+@debug_router.get("/loop", response_model=LoopMonitorResponse)
+async def get_loop_monitor():
+    """
+    Retraso reciente del bucle de eventos de este worker y últimos bloqueos,
+    con la ruta que los causó y la pila del código que bloqueaba.
+    Solo para superusuarios.
+    """
+    return FastJSONResponse(loop_monitor.snapshot())
@@ -1,19 +1,35 @@
-from fastapi import APIRouter, Depends
-import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
 
-from app.routes.schemas import CommentRequest, PostRequest, UserRequest
+from app.routes.schemas import CommentRequest, GraphRequest, GraphResponse, PostRequest, RateOptions, UserRequest
 from app.services.auth_service import current_active_user, get_token_from_cookie, get_user_manager
 from app.db import User,get_db_session
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.config import logger
-from app.services.synthetic_service import create_batch, create_fake_user, create_fake_post, create_fake_comment, set_fake_seed
+from app.config import get_logger
+from app.services.scheduler_service import GenerationScheduler
+from app.services.synthetic_service import create_batch, create_fake_users, create_fake_posts, create_fake_comments, generate_graph, generate_rows
 from sqlalchemy.exc import IntegrityError
 
 synthetic_router = APIRouter(prefix="/synthetic", tags=["Synthetic Data Generation"])
+logger = get_logger("synthetic")
 
-def _safe_sleep(speed: float):
-    """Evita sleeps demasiado pequeños."""
-    return max(0.01, 1.0 / speed)
+async def _generate_in_batches(
+    options: RateOptions,
+    rows: Sequence[Dict[str, Any]],
+    create_many: Callable[[Sequence[Dict[str, Any]]], Awaitable[List[dict]]],
+) -> tuple[List[dict], Dict[str, Any]]:
+    """
+    Crea las filas por lotes al ritmo marcado por el planificador.
+    Devuelve los elementos creados y las estadísticas de ritmo conseguido.
+    """
+    scheduler = GenerationScheduler(options.target_rate(), options.batch_size)
+    generated: List[dict] = []
+    while len(generated) < len(rows):
+        size = await scheduler.acquire(len(rows) - len(generated))
+        batch = rows[len(generated):len(generated) + size]
+        generated.extend(await create_many(batch))
+        scheduler.record(len(batch))
+    return generated, scheduler.progress()
 
 @synthetic_router.post("/users", summary="Generar y registrar usuarios ficticios")
 async def generate_users(
@@ -23,20 +39,18 @@ async def generate_users(
     db: AsyncSession = Depends(get_db_session),
     user_manager = Depends(get_user_manager),
 ):
-    set_fake_seed(request.seed)
     if request.seed is not None:
-        logger.info(f"Semilla establecida para Faker: {request.seed}")
+        logger.info("Semilla de generación: %s", request.seed)
 
     batch_id = await create_batch(db, current_user.id)
-    logger.info(f"Batch creado y guardado en la base de datos: {batch_id}")
+    logger.info("Batch creado y guardado en la base de datos: %s", batch_id)
 
-    generated_users = []
-    for _ in range(request.num_users):
-        user_data = await create_fake_user(db, user_manager=user_manager)
-        generated_users.append(user_data)
-        await asyncio.sleep(_safe_sleep(request.speed_multiplier))
-    logger.info(f"Generación de usuarios completada. Total: {len(generated_users)}")
-    return {"msg": f"{request.num_users} usuarios registrados con éxito.", "batch_id": batch_id, "data": generated_users}
+    rows = await generate_rows("user", request.num_users, request.seed)
+    generated_users, stats = await _generate_in_batches(
+        request, rows, lambda batch: create_fake_users(db, batch, user_manager=user_manager)
+    )
+    logger.info("Generación de usuarios completada. Total: %s, ritmo: %s filas/s", len(generated_users), stats["rate"])
+    return {"msg": f"{request.num_users} usuarios registrados con éxito.", "batch_id": batch_id, "stats": stats, "data": generated_users}
 
 @synthetic_router.post("/posts", summary="Generar y registrar publicaciones ficticias")
 async def generate_posts(
@@ -45,30 +59,26 @@ async def generate_posts(
     current_user: User = Depends(current_active_user),
     db: AsyncSession = Depends(get_db_session),
 ):
-    set_fake_seed(request.seed)
     if request.seed is not None:
-        logger.info(f"Semilla establecida para Faker: {request.seed}")
+        logger.info("Semilla de generación: %s", request.seed)
 
     batch_id = await create_batch(db, current_user.id)
-    logger.info(f"Batch creado y guardado en la base de datos: {batch_id}")
+    logger.info("Batch creado y guardado en la base de datos: %s", batch_id)
 
-    generated_posts = []
-    for _ in range(request.num_posts):
-        try:
-            post_data = await create_fake_post(db, request.user_id)
-        except IntegrityError as e:
-            await db.rollback()
-            if "foreign key constraint" in str(e).lower() or "violates foreign key" in str(e).lower():
-                from fastapi import HTTPException
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"El user_id '{request.user_id}' no existe."
-                )
-            raise
-        generated_posts.append(post_data)
-        await asyncio.sleep(_safe_sleep(request.speed_multiplier))
-    logger.info(f"Generación de publicaciones completada. Total: {len(generated_posts)}")
-    return {"msg": f"{request.num_posts} publicaciones registradas con éxito.", "batch_id": batch_id, "data": generated_posts}
+    rows = await generate_rows("post", request.num_posts, request.seed)
+    try:
+        generated_posts, stats = await _generate_in_batches(
+            request, rows, lambda batch: create_fake_posts(db, request.user_id, batch)
+        )
+    except IntegrityError as e:
+        if "foreign key constraint" in str(e).lower() or "violates foreign key" in str(e).lower():
+            raise HTTPException(
+                status_code=400,
+                detail=f"El user_id '{request.user_id}' no existe."
+            )
+        raise
+    logger.info("Generación de publicaciones completada. Total: %s, ritmo: %s filas/s", len(generated_posts), stats["rate"])
+    return {"msg": f"{request.num_posts} publicaciones registradas con éxito.", "batch_id": batch_id, "stats": stats, "data": generated_posts}
 
 @synthetic_router.post("/comments", summary="Generar y registrar comentarios ficticios")
 async def generate_comments(
@@ -77,17 +87,37 @@ async def generate_comments(
     current_user: User = Depends(current_active_user),
     db: AsyncSession = Depends(get_db_session),
 ):
-    set_fake_seed(request.seed)
     if request.seed is not None:
-        logger.info(f"Semilla establecida para Faker: {request.seed}")
+        logger.info("Semilla de generación: %s", request.seed)
 
     batch_id = await create_batch(db, current_user.id)
-    logger.info(f"Batch creado y guardado en la base de datos: {batch_id}")
+    logger.info("Batch creado y guardado en la base de datos: %s", batch_id)
 
-    generated_comments = []
-    for _ in range(request.num_comments):
-        comment_data = await create_fake_comment(db, current_user.id, request.post_id)
-        generated_comments.append(comment_data)
-        await asyncio.sleep(_safe_sleep(request.speed_multiplier))
-    logger.info(f"Generación de comentarios completada. Total: {len(generated_comments)}")
-    return {"msg": f"{request.num_comments} comentarios registrados con éxito.", "batch_id": batch_id, "data": generated_comments}
+    rows = await generate_rows("comment", request.num_comments, request.seed)
+    generated_comments, stats = await _generate_in_batches(
+        request, rows, lambda batch: create_fake_comments(db, current_user.id, request.post_id, batch)
+    )
+    logger.info("Generación de comentarios completada. Total: %s, ritmo: %s filas/s", len(generated_comments), stats["rate"])
+    return {"msg": f"{request.num_comments} comentarios registrados con éxito.", "batch_id": batch_id, "stats": stats, "data": generated_comments}
+
+@synthetic_router.post("/graph", response_model=GraphResponse, summary="Generar un grafo social completo en una sola llamada")
+async def generate_social_graph(
+    request: GraphRequest,
+    token: str = Depends(get_token_from_cookie),
+    current_user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Genera usuarios, posts, comentarios y likes según la especificación y los
+    carga en bloque, en orden de dependencias. Todos los usuarios generados
+    comparten la contraseña devuelta en la respuesta.
+    """
+    batch_id = await create_batch(db, current_user.id)
+    logger.info("Batch creado y guardado en la base de datos: %s", batch_id)
+
+    result = await generate_graph(db, request, batch_id)
+    logger.info(
+        "Grafo sintético generado: %s usuarios, %s posts, %s comentarios, %s likes",
+        result["users"], result["posts"], result["comments"], result["likes"],
+    )
+    return GraphResponse(msg="Grafo sintético generado con éxito.", batch_id=batch_id, **result)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Request
+
+from app.routes.schemas import LivenessResponse, ReadinessResponse
+from app.services.admission_service import admission
+from app.services.lifecycle_service import drain
+from app.services.serialization_service import FastJSONResponse
+
+health_router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@health_router.get("/live", response_model=LivenessResponse)
+async def liveness():
+    """Sonda de vida: el proceso responde. No consulta la base de datos."""
+    return FastJSONResponse({"status": "ok"})
+
+
+@health_router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse}},
+)
+async def readiness(request: Request):
+    """
+    Sonda de disponibilidad para el balanceador. Devuelve 503 mientras el
+    worker arranca, drena o tiene el pool de conexiones saturado, para que
+    deje de recibir tráfico nuevo hasta recuperarse.
+    """
+    snapshot = admission.snapshot()
+    reasons = []
+    if not getattr(request.app.state, "ready", False):
+        reasons.append("starting")
+    if drain.draining:
+        reasons.append("draining")
+    if snapshot["pool_pressure"] >= 1.0:
+        reasons.append("saturated")
+    return FastJSONResponse(
+        {"status": "unavailable" if reasons else "ready", "reasons": reasons, **snapshot},
+        status_code=503 if reasons else 200,
+    )
@@ -1,11 +1,18 @@
 import uuid
-from typing import List
-from sqlalchemy import select
+from typing import List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 
-from fastapi import APIRouter, Depends, HTTPException,status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.db import get_db_session,Post, Comment, Like, User
 from app.services.auth_service import current_active_user
+from app.services.comments_service import count_subtree, create_comment, get_comment_thread
+from app.services.idempotency_service import Idempotency, idempotency
+from app.services.posts_service import post_cache
+from app.services.serialization_service import FastJSONResponse
+from app.services.trending_service import record_interaction
 from .schemas import (
     CommentCreate,
     CommentOut,
@@ -24,14 +31,30 @@ interactions_router = APIRouter(
 )
 async def get_comments(
     post_id: uuid.UUID,
+    parent_id: Optional[uuid.UUID] = Query(None, description="Listar las respuestas a este comentario en lugar de las raíces."),
+    max_depth: int = Query(3, ge=0, le=settings.COMMENTS_MAX_DEPTH, description="Niveles de respuestas incluidos bajo cada elemento."),
+    limit: int = Query(50, ge=1, le=200, description="Elementos del nivel pedido por página."),
+    replies_limit: int = Query(
+        5, ge=0, le=settings.COMMENTS_MAX_REPLIES_PER_NODE,
+        description="Respuestas incluidas por comentario en cada nivel; el resto se pagina con `parent_id`.",
+    ),
+    cursor: Optional[str] = Query(None, description="Cursor de la cabecera `X-Next-Cursor` de la página anterior."),
     db: AsyncSession = Depends(get_db_session),
 ) -> List[CommentOut]:
     """
-    Devuelve los comentarios de una publicación específica.
+    Devuelve los comentarios de una publicación como hilo, en orden de lectura.
+
+    Se pagina un nivel (las raíces o las respuestas a `parent_id`) e incluye,
+    hasta `max_depth` niveles, las primeras `replies_limit` respuestas de cada
+    comentario. Si hay más elementos en el nivel, el cursor siguiente va en
+    `X-Next-Cursor`; si un comentario tiene más respuestas que las incluidas
+    (`reply_count`), se piden con su `parent_id`.
     """
-    result = await db.execute(select(Comment).where(Comment.post_id == post_id))
-    comments = result.scalars().all()
-    return comments  # Devuelve lista vacía si no hay comentarios
+    comments, next_cursor = await get_comment_thread(
+        db, post_id, parent_id, max_depth, limit, replies_limit, cursor
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(comments, headers=headers)  # Lista vacía si no hay comentarios
 
 @interactions_router.post(
     "/{post_id}/comments",
@@ -45,33 +68,35 @@ async def post_comment(
     comment_data: CommentCreate,
     db: AsyncSession = Depends(get_db_session),
     user: User = Depends(current_active_user),
+    idem: Idempotency = Depends(idempotency),
 ):
     """
     Permite al usuario autenticado publicar un comentario en una publicación específica.
+    Admite `Idempotency-Key` para reintentos seguros.
     """
     # Verificar si el post existe
     post = await db.get(Post, post_id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Publicación no encontrada.")
 
-    # Crear el comentario
-    new_comment = Comment(
-        post_id=post_id,
-        user_id=user.id,  
-        content=comment_data.content,
-    )
-    db.add(new_comment)
+    # Crear el comentario (o la respuesta, con su ruta en el hilo)
+    new_comment = await create_comment(db, post_id, user.id, comment_data.content, comment_data.parent_id)
     try:
+        await record_interaction(db, post_id, settings.TRENDING_COMMENT_WEIGHT)
         await db.commit()
         await db.refresh(new_comment)
+        post_cache.invalidate(post_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=500, detail=f"Error al publicar el comentario: {e}"
         )
-    return MessageResponse(
-        msg="Comentario publicado con éxito.",
-        data=new_comment,
+    return await idem.complete(
+        MessageResponse[CommentOut](
+            msg="Comentario publicado con éxito.",
+            data=CommentOut.model_validate(new_comment),
+        ),
+        status.HTTP_201_CREATED,
     )
 
 @interactions_router.post(
@@ -84,13 +109,15 @@ async def like_post(
     post_id: uuid.UUID,
     db: AsyncSession = Depends(get_db_session),
     user: User = Depends(current_active_user),
+    idem: Idempotency = Depends(idempotency),
 ):
     """
     Permite al usuario autenticado dar like a una publicación.
+    Admite `Idempotency-Key` para reintentos seguros.
     """
     # Verificar si el post existe
     post = await db.get(Post, post_id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Publicación no encontrada.")
 
     # Verificar si el like ya existe
@@ -106,13 +133,21 @@ async def like_post(
     new_like = Like(post_id=post_id, user_id=user.id)
     db.add(new_like)
     try:
+        await record_interaction(db, post_id, settings.TRENDING_LIKE_WEIGHT)
         await db.commit()
+        post_cache.invalidate(post_id)
+    except IntegrityError:
+        # Dos likes simultáneos del mismo usuario: gana el primero.
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail="Ya has dado like a esta publicación."
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=500, detail=f"Error al dar like a la publicación: {e}"
         )
-    return MessageResponse(msg="Like agregado con éxito.", data=None)
+    return await idem.complete(MessageResponse[None](msg="Like agregado con éxito.", data=None))
 
 @interactions_router.delete(
     "/{post_id}/like",
@@ -141,7 +176,9 @@ async def unlike_post(
     # Eliminar el like
     try:
         await db.delete(like)
+        await record_interaction(db, post_id, -settings.TRENDING_LIKE_WEIGHT)
         await db.commit()
+        post_cache.invalidate(post_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -165,6 +202,7 @@ async def delete_comment(
     """
     Permite al usuario autenticado eliminar un comentario por su ID.
     Solo el autor del comentario o un administrador puede eliminarlo.
+    Sus respuestas se eliminan en cascada en la base de datos.
     """
     # Verificar si el comentario existe
     comment = await db.get(Comment, comment_id)
@@ -179,8 +217,18 @@ async def delete_comment(
 
     # Eliminar el comentario
     try:
+        # Se cuenta antes del DELETE: la cascada se lleva también el subárbol.
+        removed = await count_subtree(db, comment)
         await db.delete(comment)
+        if comment.parent_id is not None:
+            await db.execute(
+                update(Comment)
+                .where(Comment.id == comment.parent_id)
+                .values(reply_count=Comment.reply_count - 1)
+            )
+        await record_interaction(db, comment.post_id, -removed * settings.TRENDING_COMMENT_WEIGHT)
         await db.commit()
+        post_cache.invalidate(comment.post_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -1,24 +1,77 @@
-from math import ceil
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from typing import AsyncIterator, List, Literal, Optional
+
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import logger
+from app.config import get_logger, settings
 from app.db import get_db_session,Post, User
 from app.services.auth_service import current_active_user
+from app.services.idempotency_service import Idempotency, idempotency
+from app.services.posts_service import BulkPostImport, get_posts_by_ids, hard_delete_post, post_cache, purge_post
+from app.services.search_service import search_comments, search_posts
+from app.services.timeline_service import fan_out_post, fan_out_posts
+from app.services.trending_service import trending_cache
+from app.services.views_service import record_views, with_pending_views
+from app.services.serialization_service import (
+    POST_COLUMNS,
+    FastJSONResponse,
+    paginated_posts_payload,
+    select_post_columns,
+)
 
 from .schemas import (
+    BulkPostsResponse,
+    PostBatchResponse,
+    PostDetail,
+    PostUpdate,
     PostCreate,
     PostOut,
     PaginatedPostsResponse,
     MessageResponse,
+    SearchResponse,
+    TrendingResponse,
 )
 
 posts_router = APIRouter(
     prefix="/posts", tags=["Posts Settings"]
 )
+logger = get_logger("posts")
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Cuerpo (o línea NDJSON) de más de {settings.POSTS_BULK_MAX_BODY_BYTES} bytes.",
+    )
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """Lee el cuerpo completo cortando con 413 en cuanto supera `limit` bytes."""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        raise _body_too_large()
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise _body_too_large()
+    return bytes(body)
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Devuelve las líneas del cuerpo a medida que llegan, sin cargarlo entero."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > settings.POSTS_BULK_MAX_BODY_BYTES:
+            raise _body_too_large()
+    if buffer:
+        yield buffer
 
 @posts_router.get(
     "/all_posts",
@@ -28,41 +81,116 @@ posts_router = APIRouter(
 async def get_all_posts(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p. ej. `id,title`)."),
+    excerpt_len: Optional[int] = Query(None, ge=1, le=10_000, description="Recorta `content` a este número de caracteres."),
     db: AsyncSession = Depends(get_db_session),
 ) -> PaginatedPostsResponse:
     """
     Devuelve todas las publicaciones paginadas.
+    La respuesta se construye directamente desde las filas y se serializa con
+    orjson, sin materializar objetos ORM ni revalidar contra `PostOut`.
+    Con `fields` y `excerpt_len` solo se leen las columnas pedidas y el
+    contenido se recorta en la base de datos.
     """
-    logger.info(f"Solicitud para listar publicaciones: page={page}, per_page={per_page}")
-    total_stmt = select(func.count()).select_from(Post)
+    columns = select_post_columns(fields, excerpt_len)
+    total_stmt = select(func.count()).select_from(Post).where(Post.deleted_at.is_(None))
     total_result = await db.execute(total_stmt)
     total = total_result.scalar_one()
-    logger.info(f"Total de publicaciones: {total}")
 
     stmt = (
-        select(Post)
-        .options(
-            selectinload(Post.comments),
-            selectinload(Post.user),
-        )
+        select(*columns)
+        .where(Post.deleted_at.is_(None))
         .offset((page - 1) * per_page)
         .limit(per_page)
     )
     result = await db.execute(stmt)
-    posts = result.scalars().all()
-    logger.info(f"Publicaciones obtenidas: {len(posts)}")
-
-    pages = ceil(total / per_page) if per_page else 1
-
-    return PaginatedPostsResponse(
-        posts=posts,
-        total=total,
-        pages=pages,
-        current_page=page,
-        per_page=per_page,
-        has_next=(page * per_page) < total,
-        has_prev=page > 1,
-    )
+    rows = result.all()
+    logger.debug("Publicaciones listadas: page=%s per_page=%s filas=%s total=%s", page, per_page, len(rows), total)
+
+    payload = paginated_posts_payload(rows, total, page, per_page)
+    record_views(payload["posts"])
+    return FastJSONResponse(payload)
+
+@posts_router.get(
+    "/search",
+    response_model=SearchResponse,
+    summary="Buscar publicaciones o comentarios por texto",
+)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Consulta en sintaxis web (\"frase\", OR, -excluir)."),
+    scope: Literal["posts", "comments"] = Query("posts"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior."),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Búsqueda de texto completo sobre el índice GIN de `posts` o `comments`.
+    Los resultados se ordenan por relevancia (el título pesa más que el
+    contenido) e incluyen un fragmento con las coincidencias resaltadas.
+    """
+    if scope == "comments":
+        payload = await search_comments(db, q, limit, cursor)
+    else:
+        payload = await search_posts(db, q, limit, cursor)
+    return FastJSONResponse(payload)
+
+@posts_router.get(
+    "/trending",
+    response_model=TrendingResponse,
+    summary="Publicaciones en tendencia",
+)
+async def get_trending(limit: int = Query(20, ge=1, le=100)):
+    """
+    Publicaciones con más likes y comentarios recientes, con decaimiento temporal.
+    Se sirve desde el top-N en memoria que recalcula una tarea periódica, por lo
+    que el coste no depende del volumen de interacciones.
+    """
+    return FastJSONResponse(trending_cache.top(limit))
+
+@posts_router.get(
+    "/batch",
+    response_model=PostBatchResponse,
+    summary="Obtener varias publicaciones por id",
+)
+async def get_posts_batch(
+    ids: List[str] = Query(..., description="Ids separados por comas o repetidos (`ids=a,b&ids=c`)."),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Hidrata hasta `POSTS_BATCH_MAX_IDS` publicaciones con una sola consulta
+    `WHERE id = ANY(...)`, pasando antes por la caché de posts. Se devuelven
+    en el orden pedido; los ids inexistentes se listan en `missing`.
+    """
+    try:
+        post_ids = list(dict.fromkeys(uuid.UUID(i) for raw in ids for i in raw.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Id de publicación no válido.")
+    if len(post_ids) > settings.POSTS_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {settings.POSTS_BATCH_MAX_IDS} ids por petición.",
+        )
+    found = await get_posts_by_ids(db, post_ids)
+    posts = with_pending_views([found[i] for i in post_ids if i in found])
+    return FastJSONResponse({"posts": posts, "missing": [i for i in post_ids if i not in found]})
+
+@posts_router.get(
+    "/{post_id}",
+    response_model=PostDetail,
+    summary="Obtener una publicación",
+)
+async def get_post(
+    post_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Devuelve una publicación con sus contadores de comentarios y likes.
+    Se sirve desde la caché de posts si está disponible y cuenta como visita.
+    """
+    post = (await get_posts_by_ids(db, [post_id])).get(post_id)
+    if post is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publicación no encontrada.")
+    return FastJSONResponse(record_views([post])[0])
 
 @posts_router.post(
     "/create_post",
@@ -73,11 +201,16 @@ async def get_all_posts(
 )
 async def create_post(
     payload: PostCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db_session),
     user: User = Depends(current_active_user),
+    idem: Idempotency = Depends(idempotency),
 ):
     """
     Crea una nueva publicación para el usuario autenticado.
+    El reparto en los timelines de los seguidores se hace en segundo plano.
+    Admite `Idempotency-Key`: un reintento devuelve la misma respuesta sin
+    crear otra publicación.
     """
     new_post = Post(
         title=payload.title,
@@ -96,7 +229,104 @@ async def create_post(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al crear la publicación: {e}"
         )
-    return MessageResponse(msg="Publicación creada con éxito.", data=new_post)
+    background_tasks.add_task(fan_out_post, new_post.id, user.id, new_post.created_at)
+    return await idem.complete(
+        MessageResponse[PostOut](msg="Publicación creada con éxito.", data=PostOut.model_validate(new_post)),
+        status.HTTP_201_CREATED,
+    )
+
+@posts_router.post(
+    "/bulk",
+    response_model=BulkPostsResponse,
+    summary="Crear publicaciones en bloque",
+    dependencies=[Depends(current_active_user)],
+)
+async def bulk_create_posts(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db_session),
+    user: User = Depends(current_active_user),
+):
+    """
+    Crea varias publicaciones del usuario autenticado en una sola petición.
+
+    Acepta un JSON `{"posts": [PostCreate, ...]}` (o la lista directamente) de
+    hasta `POSTS_BULK_MAX_ITEMS` elementos y `POSTS_BULK_MAX_BODY_BYTES` bytes, o un cuerpo NDJSON
+    (`application/x-ndjson`, un `PostCreate` por línea) que se procesa en
+    streaming. Cada elemento se valida por separado y la respuesta indica su
+    resultado por índice (posición en la lista o número de línea).
+    """
+    importer = BulkPostImport(db, user.id)
+    truncated = False
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if media_type in NDJSON_MEDIA_TYPES:
+        index = -1
+        async for line in _ndjson_lines(request):
+            index += 1
+            if not line.strip():
+                continue
+            if importer.received >= settings.POSTS_BULK_MAX_STREAM_ITEMS:
+                truncated = True
+                break
+            await importer.add_line(index, line)
+    else:
+        try:
+            body = orjson.loads(await _read_body(request, settings.POSTS_BULK_MAX_BODY_BYTES))
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cuerpo JSON no válido.")
+        items = body.get("posts") if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=422,
+                detail="Se esperaba una lista de publicaciones en `posts`.",
+            )
+        if len(items) > settings.POSTS_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Máximo {settings.POSTS_BULK_MAX_ITEMS} publicaciones por petición; usa NDJSON para más.",
+            )
+        for index, item in enumerate(items):
+            await importer.add(index, item)
+    await importer.flush()
+
+    chunk = settings.POSTS_BULK_CHUNK
+    for start in range(0, len(importer.created), chunk):
+        background_tasks.add_task(fan_out_posts, importer.created[start:start + chunk], user.id)
+    return FastJSONResponse(importer.summary(truncated))
+
+@posts_router.patch(
+    "/{post_id}",
+    response_model=MessageResponse[PostOut],
+    summary="Editar una publicación",
+    dependencies=[Depends(current_active_user)],
+)
+async def update_post(
+    post_id: uuid.UUID,
+    payload: PostUpdate,
+    db: AsyncSession = Depends(get_db_session),
+    user: User = Depends(current_active_user),
+):
+    """
+    Modifica los campos indicados de una publicación del usuario autenticado.
+    """
+    changes = payload.model_dump(exclude_unset=True, exclude_none=True)
+    stmt = (
+        update(Post)
+        .where(Post.id == post_id, Post.user_id == user.id, Post.deleted_at.is_(None))
+        .values(**changes, updated_at=func.now())
+        .returning(*POST_COLUMNS)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Publicación no encontrada o no autorizada."
+        )
+    await db.commit()
+    post_cache.invalidate(post_id)
+    return FastJSONResponse({"msg": "Publicación actualizada con éxito.", "data": row._asdict()})
 
 @posts_router.delete(
     "/{post_id}",
@@ -107,21 +337,31 @@ async def create_post(
 )
 async def delete_post(
     post_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    soft: bool = Query(False, description="Ocultar al instante y purgar comentarios y likes en segundo plano."),
     db: AsyncSession = Depends(get_db_session),
     user: User = Depends(current_active_user),
 ):
     """
     Elimina una publicación del usuario autenticado.
+    Por defecto el borrado es un único DELETE con cascada en la base de datos.
+    Con `soft=true` la publicación se oculta de inmediato y sus hijos se purgan
+    en lotes tras responder, útil para posts con hilos muy grandes.
     """
-    post = await db.get(Post, post_id)
-    if not post or post.user_id != user.id:
+    owner_id = await db.scalar(
+        select(Post.user_id).where(Post.id == post_id, Post.deleted_at.is_(None))
+    )
+    if owner_id is None or owner_id != user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Publicación no encontrada o no autorizada."
         )
     try:
-        await db.delete(post)
-        await db.commit()
+        if soft:
+            await db.execute(update(Post).where(Post.id == post_id).values(deleted_at=func.now()))
+            await db.commit()
+        else:
+            await hard_delete_post(db, post_id)
     except Exception as e:
         logger.exception("Error al eliminar la publicación")
         await db.rollback()
@@ -129,4 +369,7 @@ async def delete_post(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al eliminar la publicación."
         )
+    if soft:
+        post_cache.invalidate(post_id)
+        background_tasks.add_task(purge_post, post_id)
     return MessageResponse(msg="Publicación eliminada con éxito.", data=None)
@@ -1,13 +1,17 @@
-from math import ceil
 import uuid
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db_session,User, Post
 from app.services.auth_service import current_active_user
+from app.services.serialization_service import FastJSONResponse, paginated_posts_payload, select_post_columns
 
-from .schemas import PaginatedPostsResponse, UserRead
+from app.services.timeline_service import follow_user, get_home_timeline, unfollow_user
+from app.services.views_service import record_views, with_pending_views
+
+from .schemas import MessageResponse, PaginatedPostsResponse, TimelineResponse, UserRead
 
 profile_router = APIRouter(
     prefix="/user",
@@ -26,6 +30,57 @@ async def profile(user: User = Depends(current_active_user)):
     """
     return user
 
+@profile_router.get(
+    "/timeline",
+    response_model=TimelineResponse,
+    summary="Timeline de los usuarios seguidos",
+)
+async def home_timeline(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior."),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(current_active_user),
+):
+    """
+    Devuelve los posts propios y de los usuarios seguidos, del más reciente al más antiguo.
+    """
+    payload = await get_home_timeline(db, current_user.id, limit, cursor)
+    record_views(payload["posts"])
+    return FastJSONResponse(payload)
+
+@profile_router.post(
+    "/{user_id}/follow",
+    response_model=MessageResponse[None],
+    status_code=status.HTTP_201_CREATED,
+    summary="Seguir a un usuario",
+)
+async def follow(
+    user_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(current_active_user),
+):
+    """
+    El usuario autenticado pasa a seguir a `user_id`.
+    """
+    await follow_user(db, current_user.id, user_id)
+    return MessageResponse(msg="Ahora sigues a este usuario.", data=None)
+
+@profile_router.delete(
+    "/{user_id}/follow",
+    response_model=MessageResponse[None],
+    summary="Dejar de seguir a un usuario",
+)
+async def unfollow(
+    user_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(current_active_user),
+):
+    """
+    El usuario autenticado deja de seguir a `user_id`.
+    """
+    await unfollow_user(db, current_user.id, user_id)
+    return MessageResponse(msg="Has dejado de seguir a este usuario.", data=None)
+
 @profile_router.get(
     "/{user_id}/posts",
     response_model=PaginatedPostsResponse,
@@ -37,9 +92,12 @@ async def get_user_posts(
     current_user: User = Depends(current_active_user),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (p. ej. `id,title`)."),
+    excerpt_len: Optional[int] = Query(None, ge=1, le=10_000, description="Recorta `content` a este número de caracteres."),
 ):
     """
     Sólo permite al usuario autenticado ver sus propios posts.
+    Admite `fields` y `excerpt_len` como `/posts/all_posts`.
     """
     if current_user.id != user_id:
         raise HTTPException(
@@ -48,28 +106,20 @@ async def get_user_posts(
         )
 
     total_q = await db.execute(
-        select(func.count()).select_from(Post).where(Post.user_id == user_id)
+        select(func.count()).select_from(Post).where(Post.user_id == user_id, Post.deleted_at.is_(None))
     )
     total = total_q.scalar_one()
 
     stmt = (
-        select(Post)
-        .where(Post.user_id == user_id)
+        select(*select_post_columns(fields, excerpt_len))
+        .where(Post.user_id == user_id, Post.deleted_at.is_(None))
         .order_by(Post.created_at.desc())
         .limit(per_page)
         .offset((page - 1) * per_page)
     )
     result = await db.execute(stmt)
-    posts = result.scalars().all()
-
-    pages = ceil(total / per_page) if per_page else 1
 
-    return PaginatedPostsResponse(
-        posts=posts,
-        total=total,
-        pages=pages,
-        current_page=page,
-        per_page=per_page,
-        has_next=(page * per_page) < total,
-        has_prev=page > 1,
-    )
+    # El autor viendo sus propios posts no cuenta como visita.
+    payload = paginated_posts_payload(result.all(), total, page, per_page)
+    with_pending_views(payload["posts"])
+    return FastJSONResponse(payload)
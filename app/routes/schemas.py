@@ -1,9 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Literal, Optional, TypeVar, Union
 from uuid import UUID
 from fastapi_users import schemas
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 T = TypeVar("T")
 
@@ -20,7 +20,7 @@ class UserCreate(schemas.BaseUserCreate):
 
 class PostCreate(BaseModel):
     """Datos para crear un post."""
-    title: str
+    title: str = Field(..., max_length=200)
     content: str
     is_published: bool = False
 
@@ -35,12 +35,30 @@ class PostOut(BaseModel):
     user_id: UUID
     created_at: datetime
     updated_at: datetime
+    views: int = 0
 
     model_config = ConfigDict(from_attributes=True, validate_by_name=True)
 
+class PostUpdate(BaseModel):
+    """Campos modificables de un post; los omitidos no cambian."""
+    title: Optional[str] = Field(None, max_length=200)
+    content: Optional[str] = None
+    is_published: Optional[bool] = None
+
+class PostDetail(PostOut):
+    """Post individual con sus contadores de interacciones."""
+    comment_count: int
+    like_count: int
+
+class PostBatchResponse(BaseModel):
+    """Posts encontrados, en el orden pedido, e ids que no existen."""
+    posts: List[PostDetail]
+    missing: List[UUID]
+
 class CommentCreate(BaseModel):
-    """Datos para crear un comentario."""
+    """Datos para crear un comentario; con `parent_id` es una respuesta."""
     content: str
+    parent_id: Optional[UUID] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -51,9 +69,27 @@ class CommentOut(BaseModel):
     user_id: UUID
     post_id: UUID
     created_at: datetime
+    parent_id: Optional[UUID] = None
+    depth: int = 0
+    reply_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
+class PostSearchHit(PostOut):
+    """Resultado de búsqueda de un post con su relevancia y fragmento resaltado."""
+    rank: float
+    snippet: str
+
+class CommentSearchHit(CommentOut):
+    """Resultado de búsqueda de un comentario con su relevancia y fragmento resaltado."""
+    rank: float
+    snippet: str
+
+class SearchResponse(BaseModel):
+    """Página de resultados de búsqueda con cursor para la siguiente."""
+    results: Union[List[PostSearchHit], List[CommentSearchHit]]
+    next_cursor: Optional[str] = None
+
 class PaginatedPostsResponse(BaseModel):
     """Respuesta paginada de posts."""
     posts: List[PostOut]
@@ -64,15 +100,91 @@ class PaginatedPostsResponse(BaseModel):
     has_next: bool
     has_prev: bool
 
+class TimelineResponse(BaseModel):
+    """Página del timeline con cursor para la siguiente."""
+    posts: List[PostOut]
+    next_cursor: Optional[str] = None
+
+class BulkPostResult(BaseModel):
+    """Resultado de un elemento de la creación masiva."""
+    index: int
+    status: Literal["created", "invalid", "failed"]
+    id: Optional[UUID] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+class BulkPostsResponse(BaseModel):
+    """Resumen de la creación masiva, con un resultado por elemento."""
+    created: int
+    failed: int
+    truncated: bool = False
+    results: List[BulkPostResult]
+
+class TrendingPost(PostOut):
+    """Post en tendencia con su puntuación actual."""
+    score: float
+
+class TrendingResponse(BaseModel):
+    """Top de posts en tendencia y momento del último recálculo."""
+    posts: List[TrendingPost]
+    refreshed_at: Optional[datetime] = None
+
+class LivenessResponse(BaseModel):
+    status: str
+
+class ReadinessResponse(BaseModel):
+    """Estado de la sonda de disponibilidad y presión del worker."""
+    status: str
+    reasons: List[str]
+    pool_pressure: float
+    pool_waiting: int
+    pool_wait_ms: float
+    inflight: Dict[str, int]
+    rejected: Dict[str, int]
+
+class LoopLag(BaseModel):
+    last: float
+    avg: float
+    p99: float
+    max: float
+
+class LoopStall(BaseModel):
+    """Bloqueo del bucle: duración, petición en curso y pila del código bloqueante."""
+    at: datetime
+    lag_ms: float
+    request: Optional[Dict[str, str]] = None
+    stack: List[str]
+
+class LoopMonitorResponse(BaseModel):
+    running: bool
+    samples: int
+    lag_ms: LoopLag
+    stalls: List[LoopStall]
+
 class MessageResponse(BaseModel, Generic[T]):
     """Respuesta estándar con mensaje y datos opcionales."""
     msg: str
     data: Optional[T] = None
 
-class BaseRequest(BaseModel):
+class RateOptions(BaseModel):
+    """
+    Opciones de ritmo de la generación sintética.
+    `unthrottled` genera lo más rápido posible; si no, se usa `rows_per_second`
+    o, en su defecto, `speed_multiplier` como filas por segundo.
+    """
+    speed_multiplier: float = Field(1.0, gt=0)
+    rows_per_second: Optional[float] = Field(None, gt=0)
+    unthrottled: bool = False
+    batch_size: int = Field(100, ge=1, le=5000)
+
+    def target_rate(self) -> Optional[float]:
+        """Ritmo objetivo en filas por segundo, o None en modo sin límite."""
+        if self.unthrottled:
+            return None
+        return self.rows_per_second or self.speed_multiplier
+
+class BaseRequest(RateOptions):
     """Base para requests de generación sintética."""
     seed: Optional[int] = None
-    speed_multiplier: float = 1.0
 
 class UserRequest(BaseRequest):
     num_users: int = 10
@@ -89,13 +201,65 @@ class LikeRequest(BaseRequest):
     num_likes: int = 10
     post_id: str
 
+class CountDistribution(BaseModel):
+    """
+    Distribución del número de hijos por elemento padre (p. ej. posts por usuario).
+    `fixed` usa siempre `min`; `uniform` elige entre `min` y `max`;
+    `poisson` usa `mean` y recorta el resultado a [`min`, `max`].
+    """
+    kind: Literal["fixed", "uniform", "poisson"] = "uniform"
+    min: int = Field(0, ge=0)
+    max: int = Field(5, ge=0, le=1000)
+    mean: Optional[float] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_bounds(self) -> "CountDistribution":
+        if self.min > self.max:
+            raise ValueError("`min` no puede ser mayor que `max`.")
+        return self
+
+class GraphRequest(BaseModel):
+    """Especificación de un grafo sintético usuarios → posts → comentarios → likes."""
+    seed: Optional[int] = None
+    num_users: int = Field(100, ge=1, le=100_000)
+    posts_per_user: CountDistribution = Field(default_factory=CountDistribution)
+    comments_per_post: CountDistribution = Field(default_factory=CountDistribution)
+    likes_per_post: CountDistribution = Field(default_factory=CountDistribution)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+    @field_validator("start_date", "end_date")
+    @classmethod
+    def to_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Las fechas sin zona se interpretan en UTC para poder compararlas con las que la traen.
+        if value is None:
+            return None
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "GraphRequest":
+        if self.start_date and self.end_date and self.start_date >= self.end_date:
+            raise ValueError("`start_date` debe ser anterior a `end_date`.")
+        return self
+
+class GraphResponse(BaseModel):
+    """Resumen de un grafo sintético generado."""
+    msg: str
+    batch_id: str
+    seed: int
+    password: str
+    users: int
+    posts: int
+    comments: int
+    likes: int
+
 # --- Pydantic Models para WebSocket ---
 class Action(str, Enum):
     generate_users = "generate_users"
     generate_posts = "generate_posts"
     generate_comments = "generate_comments"
 
-class WSMessage(BaseModel):
+class WSMessage(RateOptions):
     action: str
     payload: Dict[str, Any] = Field(default_factory=dict)
     speed_multiplier: float = Field(1.0, ge=0.1, le=20)
@@ -0,0 +1,160 @@
+"""
+Lanzador de producción de ThreadFit.
+
+    python -m app.server
+
+Calcula el número de workers a partir de la cuota de CPU del cgroup (no de
+los núcleos del nodo), usa uvloop/httptools si están instalados y, con
+gunicorn disponible, precarga la aplicación en el proceso maestro para que
+los workers compartan los módulos importados (copy-on-write). Sin gunicorn
+recurre al gestor de procesos de uvicorn, que no precarga.
+"""
+import math
+import os
+from typing import Any, Dict, Optional
+
+from app.config import logger, settings
+
+APP = "main:app"
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """Cuota de CPU del contenedor en núcleos, o None si no hay límite."""
+    try:
+        # cgroup v2: "<quota> <period>" o "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as fh:
+            quota, period = fh.read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as fh:
+            quota = int(fh.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as fh:
+            period = int(fh.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> float:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    return max(1, math.ceil(available_cpus()))
+
+
+def _loop_and_http() -> Dict[str, str]:
+    options = {"loop": "asyncio", "http": "h11"}
+    try:
+        import uvloop  # noqa: F401
+        options["loop"] = "uvloop"
+    except ImportError:
+        logger.warning("uvloop no está instalado; se usa el bucle asyncio estándar.")
+    try:
+        import httptools  # noqa: F401
+        options["http"] = "httptools"
+    except ImportError:
+        logger.warning("httptools no está instalado; se usa el parser h11.")
+    return options
+
+
+def _ssl_options() -> Dict[str, str]:
+    if settings.SERVER_SSL_CERTFILE and settings.SERVER_SSL_KEYFILE:
+        return {"certfile": settings.SERVER_SSL_CERTFILE, "keyfile": settings.SERVER_SSL_KEYFILE}
+    return {}
+
+
+def gunicorn_options(workers: int) -> Dict[str, Any]:
+    return {
+        "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+        "workers": workers,
+        "worker_class": "app.server.ThreadFitWorker",
+        "preload_app": settings.SERVER_PRELOAD,
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "backlog": settings.SERVER_BACKLOG,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "timeout": settings.SERVER_TIMEOUT_SECONDS,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "accesslog": "-" if settings.SERVER_ACCESS_LOG else None,
+        **_ssl_options(),
+    }
+
+
+try:
+    from gunicorn.app.base import BaseApplication
+
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class ThreadFitWorker(UvicornWorker):
+        """Worker de uvicorn con uvloop/httptools y el keep-alive de Settings."""
+
+        CONFIG_KWARGS = {
+            **UvicornWorker.CONFIG_KWARGS,
+            **_loop_and_http(),
+            "timeout_keep_alive": settings.SERVER_KEEPALIVE_SECONDS,
+        }
+
+    class ThreadFitApplication(BaseApplication):
+        def __init__(self, options: Dict[str, Any]) -> None:
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+except ImportError:
+    BaseApplication = None
+
+
+def run() -> None:
+    workers = worker_count()
+    logger.info(
+        "Arrancando ThreadFit: %s workers (CPU disponible: %.2f) en %s:%s",
+        workers, available_cpus(), settings.SERVER_HOST, settings.SERVER_PORT,
+    )
+    if BaseApplication is not None:
+        ThreadFitApplication(gunicorn_options(workers)).run()
+        return
+
+    import uvicorn
+
+    logger.warning("gunicorn no está instalado; se usa uvicorn sin precarga de la aplicación.")
+    ssl = _ssl_options()
+    uvicorn.run(
+        APP,
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+        ssl_certfile=ssl.get("certfile"),
+        ssl_keyfile=ssl.get("keyfile"),
+        **_loop_and_http(),
+    )
+
+
+if __name__ == "__main__":
+    run()
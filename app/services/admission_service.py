@@ -0,0 +1,156 @@
+import math
+import random
+from typing import Any, Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import logger, settings
+from app.db import pool_stats
+from app.services.metrics_service import metrics
+from app.services.serialization_service import FastJSONResponse
+
+READ = "read"
+WRITE = "write"
+EXPORT = "export"
+GENERATION = "generation"
+
+# Presión del pool (1.0 = saturado) a partir de la cual se rechaza cada clase:
+# primero lo caro y aplazable; las lecturas baratas solo con el pool saturado.
+SHED_AT: Dict[str, float] = {GENERATION: 0.25, EXPORT: 0.5, WRITE: 0.9, READ: 1.0}
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Sondas y documentación nunca se rechazan.
+EXEMPT_PATHS = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+# Código de cierre WebSocket "Try Again Later".
+WS_TRY_AGAIN_LATER = 1013
+
+
+def classify_route(method: str, path: str) -> str:
+    """Clase de coste de una ruta: exportación, generación, escritura o lectura."""
+    if path.startswith("/data"):
+        return EXPORT
+    if path.startswith(("/synthetic", "/ws")):
+        return GENERATION
+    if method in READ_METHODS:
+        return READ
+    return WRITE
+
+
+def pool_pressure() -> float:
+    """Presión del pool de conexiones: 1.0 equivale a saturación."""
+    return max(
+        pool_stats.waiting / settings.ADMISSION_MAX_POOL_WAITERS,
+        pool_stats.wait_seconds / settings.ADMISSION_MAX_POOL_WAIT_SECONDS,
+    )
+
+
+class AdmissionController:
+    """
+    Peticiones en curso y rechazadas por clase de ruta en este worker.
+
+    Una petición se rechaza si su clase ya tiene `ADMISSION_MAX_INFLIGHT_*`
+    peticiones en curso o si la presión del pool alcanza el umbral de la
+    clase en `SHED_AT`. Así las colas de checkout no crecen sin límite y lo
+    último que se deja de servir son las lecturas.
+    """
+
+    def __init__(self) -> None:
+        self.inflight: Dict[str, int] = dict.fromkeys(SHED_AT, 0)
+        self.rejected: Dict[str, int] = dict.fromkeys(SHED_AT, 0)
+
+    @staticmethod
+    def limit(route_class: str) -> int:
+        return getattr(settings, f"ADMISSION_MAX_INFLIGHT_{route_class.upper()}")
+
+    def reject_reason(self, route_class: str, count_inflight: bool = True) -> Optional[str]:
+        if count_inflight and self.inflight[route_class] >= self.limit(route_class):
+            return f"Demasiadas peticiones de tipo '{route_class}' en curso."
+        if pool_pressure() >= SHED_AT[route_class]:
+            return "El servicio está saturado; inténtalo más tarde."
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pool_pressure": round(pool_pressure(), 3),
+            "pool_waiting": pool_stats.waiting,
+            "pool_wait_ms": round(pool_stats.wait_seconds * 1000, 1),
+            "inflight": dict(self.inflight),
+            "rejected": dict(self.rejected),
+        }
+
+
+admission = AdmissionController()
+
+metrics.callback(
+    "threadfit_requests_inflight", "gauge", "Peticiones en curso por clase de ruta.",
+    lambda: [({"route_class": c}, n) for c, n in admission.inflight.items()],
+)
+metrics.callback(
+    "threadfit_requests_rejected_total", "counter", "Peticiones rechazadas con 503 por clase de ruta.",
+    lambda: [({"route_class": c}, n) for c, n in admission.rejected.items()],
+)
+metrics.callback(
+    "threadfit_db_pool_waiting", "gauge", "Peticiones esperando una conexión del pool.",
+    lambda: pool_stats.waiting,
+)
+metrics.callback(
+    "threadfit_db_pool_wait_seconds", "gauge", "Espera media de checkout del pool.",
+    lambda: pool_stats.wait_seconds,
+)
+
+
+def retry_after_seconds() -> int:
+    """Espera sugerida, mayor cuanto más presión y con jitter para no sincronizar reintentos."""
+    base = settings.ADMISSION_RETRY_AFTER_SECONDS
+    return math.ceil(base * (1 + min(pool_pressure(), 4.0))) + random.randint(0, base)
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI de control de admisión.
+
+    Las peticiones HTTP cuentan como en curso hasta que termina la respuesta.
+    Los WebSocket de generación solo se rechazan por presión del pool (cierre
+    1013): su número ya lo limita `ConnectionManager`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] not in ("http", "websocket")
+            or not settings.ADMISSION_ENABLED
+            or scope["path"] == "/"
+            or scope["path"].startswith(EXEMPT_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            if admission.reject_reason(GENERATION, count_inflight=False):
+                admission.rejected[GENERATION] += 1
+                await send({"type": "websocket.close", "code": WS_TRY_AGAIN_LATER})
+                return
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        reason = admission.reject_reason(route_class)
+        if reason:
+            admission.rejected[route_class] += 1
+            logger.debug("Petición rechazada (%s %s): %s", scope["method"], scope["path"], reason)
+            response = FastJSONResponse(
+                {"detail": reason},
+                status_code=503,
+                headers={"Retry-After": str(retry_after_seconds())},
+            )
+            await response(scope, receive, send)
+            return
+
+        admission.inflight[route_class] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.inflight[route_class] -= 1
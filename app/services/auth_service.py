@@ -1,17 +1,22 @@
 from fastapi import HTTPException, Request, status, Depends
-from fastapi_users import FastAPIUsers, BaseUserManager, UUIDIDMixin
+from fastapi_users import FastAPIUsers, BaseUserManager, UUIDIDMixin, exceptions
 from fastapi_users.authentication import (
     CookieTransport,
     AuthenticationBackend,
     JWTStrategy,
 )
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users.jwt import decode_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db_session,User
 from app.config import settings
+from app.routes.schemas import UserCreate
+from app.services.password_service import password_hasher
 import uuid
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from uuid import UUID
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
@@ -22,6 +27,47 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
     reset_password_token_secret = settings.JWT_SECRET_KEY
     verification_token_secret = settings.JWT_SECRET_KEY
 
+    # `create` y `authenticate` repiten la lógica de BaseUserManager, pero el
+    # hash y la verificación se hacen en el pool de hilos y no en el bucle.
+
+    async def create(
+        self,
+        user_create: UserCreate,
+        safe: bool = False,
+        request: Optional[Request] = None,
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+        if await self.user_db.get_by_email(user_create.email) is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Se calcula un hash igualmente para no revelar por el tiempo si el email existe.
+            await password_hasher.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await password_hasher.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        # Hash de otro algoritmo o con parámetros antiguos: se guarda el recalculado.
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
 async def get_user_db(
     session: AsyncSession = Depends(get_db_session),
 ) -> AsyncGenerator[SQLAlchemyUserDatabase[User, UUID], None]:
@@ -32,7 +78,7 @@ async def get_user_manager(
     user_db: SQLAlchemyUserDatabase[User, UUID] = Depends(get_user_db),
 ) -> AsyncGenerator[UserManager, None]:
     """Instancia el UserManager personalizado."""
-    yield UserManager(user_db)
+    yield UserManager(user_db, password_hasher.helper)
 
 def get_jwt_strategy() -> JWTStrategy:
     """Retorna la estrategia JWT configurada con los parámetros del entorno."""
@@ -60,6 +106,26 @@ fastapi_users = FastAPIUsers[User, uuid.UUID](
 )
 
 current_active_user = fastapi_users.current_user(active=True)
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
+
+def decode_access_token(token: str) -> UUID:
+    """
+    Devuelve el id de usuario de un token de acceso emitido por `auth_backend`.
+    Lanza ValueError si el token no es válido, ha caducado o no trae `sub`.
+    """
+    try:
+        payload = decode_jwt(
+            token,
+            settings.JWT_SECRET_KEY,
+            audience=["fastapi-users:auth"],
+            algorithms=[settings.JWT_ALGORITHM],
+        )
+    except jwt.PyJWTError as e:
+        raise ValueError(str(e)) from e
+    user_id = payload.get("sub")
+    if not user_id:
+        raise ValueError("El token no contiene el campo 'sub'.")
+    return UUID(user_id)
 
 def get_token_from_cookie(request: Request) -> str:
     token = request.cookies.get(settings.COOKIE_NAME)
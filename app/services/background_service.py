@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from app.config import logger
+
+
+class PeriodicTask:
+    """
+    Ejecuta una corrutina cada `interval` segundos en segundo plano.
+    Los errores se registran y no detienen el bucle.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], Awaitable[None]]) -> None:
+        self.name = name
+        self.interval = interval
+        self._fn = fn
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error en la tarea periódica '%s'", self.name)
+            await asyncio.sleep(self.interval)
+
+    async def stop(self, run_final: bool = False) -> None:
+        """Detiene el bucle; con `run_final` ejecuta una última pasada (p. ej. un flush)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if run_final:
+            await self._fn()
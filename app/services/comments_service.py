@@ -0,0 +1,168 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import exists, func, literal_column, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import Comment, Post
+from app.services.serialization_service import COMMENT_COLUMNS, decode_cursor, encode_cursor, rows_to_dicts
+
+# Ruta materializada: un segmento por nivel, separados por ".". Cada segmento
+# es el instante de creación en µs (16 hex) más 8 hex del id, así que ordenar
+# por `path` (collation "C") recorre el hilo en profundidad y a los hermanos
+# por antigüedad.
+PATH_SEPARATOR = "."
+
+
+def path_segment(comment_id: uuid.UUID, created_at: datetime) -> str:
+    return f"{int(created_at.timestamp() * 1_000_000):016x}{comment_id.hex[:8]}"
+
+
+def root_comment_fields(comment_id: uuid.UUID, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Campos de árbol de un comentario de primer nivel (también para inserciones masivas)."""
+    created_at = created_at or datetime.now(timezone.utc)
+    return {"created_at": created_at, "path": path_segment(comment_id, created_at), "depth": 0}
+
+
+async def create_comment(
+    db: AsyncSession,
+    post_id: uuid.UUID,
+    user_id: uuid.UUID,
+    content: str,
+    parent_id: Optional[uuid.UUID] = None,
+) -> Comment:
+    """
+    Añade el comentario (o respuesta) a la sesión con su ruta y profundidad,
+    e incrementa `reply_count` del padre. No confirma la transacción.
+    """
+    comment_id = uuid.uuid4()
+    fields = root_comment_fields(comment_id)
+    if parent_id is not None:
+        parent = (await db.execute(
+            select(Comment.post_id, Comment.path, Comment.depth).where(Comment.id == parent_id)
+        )).first()
+        if parent is None or parent.post_id != post_id:
+            raise HTTPException(status_code=404, detail="Comentario padre no encontrado en esta publicación.")
+        if parent.depth + 1 > settings.COMMENTS_MAX_DEPTH:
+            raise HTTPException(status_code=400, detail="Se ha alcanzado la profundidad máxima del hilo.")
+        fields["path"] = f"{parent.path}{PATH_SEPARATOR}{fields['path']}"
+        fields["depth"] = parent.depth + 1
+        await db.execute(
+            update(Comment).where(Comment.id == parent_id).values(reply_count=Comment.reply_count + 1)
+        )
+    comment = Comment(
+        id=comment_id,
+        post_id=post_id,
+        user_id=user_id,
+        parent_id=parent_id,
+        content=content,
+        **fields,
+    )
+    db.add(comment)
+    return comment
+
+
+async def count_subtree(db: AsyncSession, comment: Comment) -> int:
+    """Comentarios que borra la cascada al eliminar `comment`: él y todas sus respuestas."""
+    # Rango sobre (post_id, path): las rutas que empiezan por "<path>." quedan
+    # entre ese prefijo y el mismo con el separador sustituido por el carácter siguiente.
+    prefix = comment.path + PATH_SEPARATOR
+    descendants = await db.scalar(
+        select(func.count())
+        .select_from(Comment)
+        .where(
+            Comment.post_id == comment.post_id,
+            Comment.path > prefix,
+            Comment.path < comment.path + chr(ord(PATH_SEPARATOR) + 1),
+        )
+    )
+    return 1 + descendants
+
+
+def _decode_thread_cursor(cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    path = decode_cursor(cursor).get("p")
+    if not isinstance(path, str):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de comentarios no válido.",
+        )
+    return path
+
+
+async def get_comment_thread(
+    db: AsyncSession,
+    post_id: uuid.UUID,
+    parent_id: Optional[uuid.UUID],
+    max_depth: int,
+    limit: int,
+    replies_limit: int,
+    cursor: Optional[str],
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Página de un nivel del hilo (raíces del post o respuestas a `parent_id`)
+    con hasta `replies_limit` respuestas por comentario en cada uno de los
+    `max_depth` niveles inferiores, en orden de lectura.
+
+    La paginación es por nivel: el cursor avanza entre los elementos del nivel
+    pedido. Si un comentario tiene más respuestas (`reply_count`) que las
+    incluidas, se siguen paginando pidiendo su `parent_id`. Así la respuesta
+    queda acotada aunque un comentario tenga miles de respuestas.
+    """
+    after = _decode_thread_cursor(cursor)
+    same_parent = Comment.parent_id.is_(None) if parent_id is None else Comment.parent_id == parent_id
+    level_stmt = (
+        select(*COMMENT_COLUMNS, Comment.path)
+        .where(
+            Comment.post_id == post_id,
+            same_parent,
+            # Los comentarios de un post borrado dejan de verse aunque su purga no haya terminado.
+            exists().where(Post.id == post_id, Post.deleted_at.is_(None)),
+        )
+        .order_by(Comment.path)
+        .limit(limit + 1)
+    )
+    if after:
+        level_stmt = level_stmt.where(Comment.path > after)
+    level = (await db.execute(level_stmt)).all()
+
+    next_cursor = None
+    if len(level) > limit:
+        # El elemento de más solo indica que hay página siguiente.
+        level = level[:limit]
+        next_cursor = encode_cursor({"p": level[-1].path})
+
+    rows = list(level)
+    if level and max_depth > 0 and replies_limit > 0:
+        # Recorrido recursivo desde los elementos de la página; en cada nodo
+        # solo se toman sus primeras `replies_limit` respuestas (índice
+        # post_id, parent_id, path), sin leer el resto del subárbol.
+        tree = (
+            select(Comment.id.label("id"), literal_column("0").label("level"))
+            .where(Comment.id.in_([row.id for row in level]))
+            .cte("thread", recursive=True)
+        )
+        replies = (
+            select(Comment.id)
+            .where(Comment.post_id == post_id, Comment.parent_id == tree.c.id)
+            .order_by(Comment.path)
+            .limit(replies_limit)
+            .lateral("replies")
+        )
+        tree = tree.union_all(
+            select(replies.c.id, tree.c.level + 1)
+            .select_from(tree.join(replies, true()))
+            .where(tree.c.level < max_depth)
+        )
+        descendants = select(*COMMENT_COLUMNS, Comment.path).join(tree, Comment.id == tree.c.id).where(tree.c.level > 0)
+        rows.extend((await db.execute(descendants)).all())
+        rows.sort(key=lambda row: row.path)
+
+    comments = rows_to_dicts(rows)
+    for comment in comments:
+        del comment["path"]
+    return comments, next_cursor
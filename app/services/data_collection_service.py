@@ -3,12 +3,6 @@ from io import BytesIO, StringIO
 
 from fastapi.responses import StreamingResponse
 from app.db import Comment, Post, User
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-)
 
 def to_dict_user(user: User) -> dict:
     return {
@@ -48,6 +42,13 @@ def csv_response(data: list, fieldnames: list, filename: str):
     })
 
 def pdf_response(title: str, headers: list, rows: list, filename: str):
+    # ReportLab se importa al generar el primer PDF: cuesta ~200 ms y varios MB
+    # por worker y solo lo usan las exportaciones en PDF.
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer,
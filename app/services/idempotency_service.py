@@ -0,0 +1,176 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Optional, Tuple
+
+import orjson
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app.config import logger, settings
+from app.db import User
+from app.services.auth_service import current_active_user
+
+# Marca de clave reservada por una petición que aún no ha terminado.
+IN_FLIGHT = b""
+
+
+class MemoryKeyStore:
+    """Almacén en proceso con caducidad por TTL y expulsión LRU por tamaño."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._data: "OrderedDict[bytes, Tuple[float, bytes]]" = OrderedDict()
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: bytes, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+    async def get(self, key: bytes) -> Optional[bytes]:
+        return self._live(key)
+
+    async def reserve(self, key: bytes, ttl: float) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._put(key, IN_FLIGHT, ttl)
+        return True
+
+    async def set(self, key: bytes, value: bytes, ttl: float) -> None:
+        self._put(key, value, ttl)
+
+    async def delete(self, key: bytes) -> None:
+        self._data.pop(key, None)
+
+
+class RedisKeyStore:
+    """Almacén compartido entre workers sobre Redis (SET NX EX)."""
+
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis  # dependencia opcional
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: bytes) -> Optional[bytes]:
+        return await self._redis.get(b"idem:" + key)
+
+    async def reserve(self, key: bytes, ttl: float) -> bool:
+        return bool(await self._redis.set(b"idem:" + key, IN_FLIGHT, nx=True, ex=int(ttl)))
+
+    async def set(self, key: bytes, value: bytes, ttl: float) -> None:
+        await self._redis.set(b"idem:" + key, value, ex=int(ttl))
+
+    async def delete(self, key: bytes) -> None:
+        await self._redis.delete(b"idem:" + key)
+
+
+def _build_store():
+    if settings.REDIS_URL:
+        try:
+            return RedisKeyStore(settings.REDIS_URL)
+        except ImportError:
+            logger.warning("REDIS_URL definido pero el paquete 'redis' no está instalado; se usa memoria.")
+    return MemoryKeyStore(settings.IDEMPOTENCY_MAX_KEYS)
+
+
+key_store = _build_store()
+
+
+def _encode(fingerprint: bytes, status_code: int, body: bytes) -> bytes:
+    return fingerprint + status_code.to_bytes(2, "big") + body
+
+
+def _decode(value: bytes) -> Tuple[bytes, int, bytes]:
+    return value[:16], int.from_bytes(value[16:18], "big"), value[18:]
+
+
+class IdempotentReplay(Exception):
+    """Se lanza cuando la petición ya se completó; el manejador devuelve la respuesta guardada."""
+
+    def __init__(self, status_code: int, body: bytes) -> None:
+        self.status_code = status_code
+        self.body = body
+
+
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay) -> Response:
+    return Response(
+        content=exc.body,
+        status_code=exc.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class Idempotency:
+    """
+    Estado de una petición con `Idempotency-Key`. Sin cabecera no hace nada.
+    El endpoint llama a `complete` con su respuesta para guardarla.
+    """
+
+    def __init__(self, key: Optional[bytes], fingerprint: bytes) -> None:
+        self.key = key
+        self.fingerprint = fingerprint
+        self.completed = False
+
+    async def complete(self, content: Any, status_code: int = status.HTTP_200_OK) -> Response:
+        body = orjson.dumps(jsonable_encoder(content))
+        if self.key is not None:
+            await key_store.set(self.key, _encode(self.fingerprint, status_code, body), settings.IDEMPOTENCY_TTL_SECONDS)
+            self.completed = True
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+async def idempotency(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    user: User = Depends(current_active_user),
+) -> AsyncIterator[Idempotency]:
+    """
+    Dependencia para endpoints de escritura.
+
+    La clave se asocia al usuario y a la ruta; el cuerpo se resume en una
+    huella para detectar reutilizaciones de la clave con otro contenido.
+    Un reintento de una petición ya completada devuelve la respuesta guardada
+    sin ejecutar el endpoint; si la original sigue en curso responde 409.
+    """
+    if idempotency_key is None:
+        yield Idempotency(None, b"")
+        return
+
+    fingerprint = hashlib.blake2b(await request.body(), digest_size=16).digest()
+
+    scope = f"{user.id}:{request.method}:{request.url.path}:{idempotency_key}"
+    key = hashlib.blake2b(scope.encode(), digest_size=16).digest()
+    if not await key_store.reserve(key, settings.IDEMPOTENCY_LOCK_SECONDS):
+        stored = await key_store.get(key)
+        if not stored:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ya hay una petición en curso con esta Idempotency-Key.",
+            )
+        stored_fingerprint, status_code, body = _decode(stored)
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="La Idempotency-Key ya se usó con otro cuerpo de petición.",
+            )
+        raise IdempotentReplay(status_code, body)
+
+    state = Idempotency(key, fingerprint)
+    try:
+        yield state
+    finally:
+        # Si el endpoint falló, se libera la clave para que el reintento se procese.
+        if not state.completed:
+            await key_store.delete(key)
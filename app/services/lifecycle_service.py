@@ -0,0 +1,158 @@
+import asyncio
+import signal
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+from sqlalchemy import select, text
+
+from app.config import logger, settings
+from app.db import User, engine
+from app.services.loop_monitor_service import loop_monitor
+from app.services.password_service import password_hasher
+from app.services.posts_service import post_purger
+from app.services.serialization_service import COMMENT_COLUMNS, POST_COLUMNS
+from app.services.synthetic_service import shutdown_process_pool
+from app.services.tracing_service import shutdown_tracing
+from app.services.trending_service import trending_refresher
+from app.services.views_service import view_flusher
+
+# Consultas de calentamiento: abren la sesión TLS/auth y dejan preparadas (y con
+# la introspección de tipos de asyncpg hecha) las sentencias de las rutas calientes.
+WARMUP_STATEMENTS = (
+    text("SELECT 1"),
+    select(*POST_COLUMNS).limit(1),
+    select(*COMMENT_COLUMNS).limit(1),
+    select(User.id, User.email, User.is_active).limit(1),
+)
+
+
+class DrainCoordinator:
+    """
+    Coordina el cierre ordenado de las generaciones por WebSocket.
+
+    Al recibir SIGTERM se activa `draining`: no se aceptan generaciones nuevas
+    y las que están en curso terminan su lote actual, envían un `checkpoint`
+    y cierran. El apagado del servidor espera a que terminen (con límite).
+    """
+
+    def __init__(self) -> None:
+        self.draining = False
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        self._active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._idle.set()
+
+    def begin(self) -> None:
+        if not self.draining:
+            logger.info("Iniciando drenaje: %s generaciones en curso.", self._active)
+        self.draining = True
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Drenaje incompleto tras %.0fs: %s generaciones sin terminar.", timeout, self._active)
+
+
+drain = DrainCoordinator()
+
+
+def _on_exit_signal(loop: asyncio.AbstractEventLoop, previous, signum, frame) -> None:
+    if drain.draining:
+        previous(signum, frame)
+        return
+    drain.begin()
+
+    async def drain_then_exit() -> None:
+        await drain.wait(settings.SHUTDOWN_DRAIN_SECONDS)
+        previous(signum, frame)
+
+    loop.call_soon_threadsafe(loop.create_task, drain_then_exit())
+
+
+def _install_drain_handlers(loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Antepone el drenaje al manejador de SIGTERM/SIGINT del servidor (uvicorn),
+    que solo empieza a cerrar sockets cuando el drenaje termina. Una segunda
+    señal se pasa directamente al servidor.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # Solo el hilo principal puede instalar manejadores (p. ej. TestClient).
+        return
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if callable(previous):
+            signal.signal(sig, partial(_on_exit_signal, loop, previous))
+
+
+async def warm_up_pool(connections: int) -> None:
+    """Abre a la vez `connections` conexiones del pool y ejecuta en cada una las consultas de calentamiento."""
+    connections = min(connections, settings.DB_POOL_SIZE)
+    if connections <= 0:
+        return
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(*(
+            stack.enter_async_context(engine.connect()) for _ in range(connections)
+        ))
+        for conn in conns:
+            for stmt in WARMUP_STATEMENTS:
+                await conn.execute(stmt)
+    logger.info("Pool de conexiones calentado con %s conexiones.", connections)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Ciclo de vida de la aplicación.
+    Arranque: calienta el pool antes de aceptar tráfico y lanza las tareas
+    periódicas. Cierre: drena generaciones, detiene tareas, vuelca visitas y
+    libera los pools de procesos y de hash y las conexiones y exporta las trazas pendientes.
+    """
+    app.state.ready = False
+    try:
+        await asyncio.wait_for(warm_up_pool(settings.DB_POOL_WARMUP), settings.DB_POOL_WARMUP_TIMEOUT)
+    except Exception:
+        # Sin base de datos disponible se arranca igualmente; las conexiones se abrirán bajo demanda.
+        logger.exception("No se pudo calentar el pool de conexiones.")
+    # El primer barrido retoma las purgas que quedaron a medias antes del reinicio.
+    post_purger.start()
+    trending_refresher.start()
+    view_flusher.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    _install_drain_handlers(asyncio.get_running_loop())
+    app.state.ready = True
+    logger.info("La aplicación ThreadFit ha iniciado.")
+
+    yield
+
+    app.state.ready = False
+    logger.info("La aplicación ThreadFit se está cerrando.")
+    drain.begin()
+    await drain.wait(settings.SHUTDOWN_DRAIN_SECONDS)
+    await post_purger.stop()
+    await trending_refresher.stop()
+    await loop_monitor.stop()
+    # Último volcado para no perder las visitas acumuladas.
+    try:
+        await view_flusher.stop(run_final=True)
+    except Exception:
+        logger.exception("No se pudieron volcar las visitas pendientes.")
+    shutdown_process_pool()
+    password_hasher.shutdown()
+    await engine.dispose()
+    logger.info("Conexiones a la base de datos cerradas.")
+    shutdown_tracing()
@@ -0,0 +1,163 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import get_logger, settings
+from app.services.admission_service import classify_route
+from app.services.metrics_service import metrics
+
+logger = get_logger("loop")
+
+stalls = metrics.counter(
+    "threadfit_event_loop_stalls_total",
+    "Bloqueos del bucle de eventos por encima de LOOP_SLOW_CALLBACK_SECONDS, por clase de ruta.",
+)
+
+
+def _route_of(frame: Optional[FrameType]) -> Optional[Dict[str, str]]:
+    """Busca en la pila el `scope` ASGI de la petición que está ocupando el bucle."""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            method = scope.get("method", "WS")
+            return {
+                "method": method,
+                "path": scope.get("path", ""),
+                "route": getattr(scope.get("route"), "path", scope.get("path", "")),
+                "route_class": classify_route(method, scope.get("path", "")),
+            }
+        frame = frame.f_back
+    return None
+
+
+def _format_stack(frame: FrameType, depth: int) -> List[str]:
+    return [
+        f"{entry.filename}:{entry.lineno} in {entry.name}"
+        for entry in traceback.extract_stack(frame, limit=depth)
+    ]
+
+
+class LoopMonitor:
+    """
+    Mide el retraso del bucle de eventos y captura quién lo bloquea.
+
+    Un latido en el bucle duerme `LOOP_MONITOR_INTERVAL_SECONDS` y anota
+    cuánto tarda de más en despertar (lag). Un hilo vigilante comprueba que
+    el latido avanza; si lleva más de `LOOP_SLOW_CALLBACK_SECONDS` parado,
+    toma la pila del hilo del bucle en ese momento, que es el código que
+    está bloqueando, y la ruta de la petición en curso. Los bloqueos
+    demasiado cortos para que el vigilante los vea se registran sin pila.
+    """
+
+    def __init__(self) -> None:
+        self.samples: Deque[float] = deque(maxlen=settings.LOOP_MONITOR_WINDOW)
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=settings.LOOP_MONITOR_MAX_EVENTS)
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._pending: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join(timeout=1)
+
+    async def _heartbeat(self) -> None:
+        interval = settings.LOOP_MONITOR_INTERVAL_SECONDS
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            previous, self._beat = self._beat, now
+            self.samples.append(lag)
+            if lag >= settings.LOOP_SLOW_CALLBACK_SECONDS:
+                self._record_stall(lag, previous)
+
+    def _record_stall(self, lag: float, previous_beat: float) -> None:
+        pending, self._pending = self._pending, None
+        # Solo vale la captura del vigilante si corresponde a este mismo bloqueo.
+        if pending is None or pending.pop("beat") != previous_beat:
+            pending = {"request": None, "stack": []}
+        event = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "lag_ms": round(lag * 1000, 1),
+            **pending,
+        }
+        self.events.append(event)
+        request = event["request"]
+        stalls.inc(route_class=request["route_class"] if request else "unknown")
+        logger.warning(
+            "Bucle de eventos bloqueado %.0f ms en %s",
+            lag * 1000,
+            f"{request['method']} {request['route']}" if request else "código desconocido",
+            extra={"stack": event["stack"][-5:]},
+        )
+
+    def _watch(self) -> None:
+        interval = settings.LOOP_MONITOR_INTERVAL_SECONDS
+        threshold = settings.LOOP_SLOW_CALLBACK_SECONDS
+        while not self._stopping.wait(threshold / 4):
+            beat = self._beat
+            if self._pending is not None or time.monotonic() - beat < interval + threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._pending = {
+                "beat": beat,
+                "request": _route_of(frame),
+                "stack": _format_stack(frame, settings.LOOP_MONITOR_STACK_DEPTH),
+            }
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        return {
+            "running": self._task is not None,
+            "samples": count,
+            "lag_ms": {
+                "last": round(self.samples[-1] * 1000, 2) if count else 0.0,
+                "avg": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+                "p99": round(ordered[min(count - 1, int(count * 0.99))] * 1000, 2) if count else 0.0,
+                "max": round(ordered[-1] * 1000, 2) if count else 0.0,
+            },
+            "stalls": list(self.events),
+        }
+
+
+loop_monitor = LoopMonitor()
+
+metrics.callback(
+    "threadfit_event_loop_lag_seconds", "gauge", "Último retraso medido del bucle de eventos.",
+    lambda: loop_monitor.samples[-1] if loop_monitor.samples else 0.0,
+)
+metrics.callback(
+    "threadfit_event_loop_lag_max_seconds", "gauge", "Retraso máximo del bucle en la ventana reciente.",
+    lambda: max(loop_monitor.samples, default=0.0),
+)
@@ -0,0 +1,91 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+LabelSet = Tuple[Tuple[str, str], ...]
+Sample = Tuple[Dict[str, Any], float]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelSet:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    pairs = (
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Contador monótono con etiquetas."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelSet, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def samples(self) -> Iterable[Tuple[LabelSet, float]]:
+        return list(self._values.items())
+
+
+class CallbackMetric:
+    """Métrica cuyo valor se lee al exportar (estado que ya lleva otro componente)."""
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        help: str,
+        fn: Callable[[], Union[float, List[Sample]]],
+    ) -> None:
+        self.name = name
+        self.type = type
+        self.help = help
+        self._fn = fn
+
+    def samples(self) -> Iterable[Tuple[LabelSet, float]]:
+        value = self._fn()
+        if isinstance(value, (int, float)):
+            return [((), float(value))]
+        return [(_labels(labels), float(v)) for labels, v in value]
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas del worker, exportado en formato de texto de
+    Prometheus por `GET /metrics`. Cada worker lleva las suyas: con varios
+    workers, Prometheus debe raspar cada proceso o agregarlas por pod.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Union[Counter, CallbackMetric]] = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = self._metrics.setdefault(name, Counter(name, help))
+        return metric  # type: ignore[return-value]
+
+    def callback(self, name: str, type: str, help: str, fn: Callable[[], Union[float, List[Sample]]]) -> None:
+        self._metrics[name] = CallbackMetric(name, type, help, fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in metric.samples():
+                lines.append(f"{metric.name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from app.config import settings
+from app.services.metrics_service import metrics
+
+T = TypeVar("T")
+
+
+def build_password_hash() -> PasswordHash:
+    """
+    Hashers con los parámetros de `Settings`. El primero es el de
+    `PASSWORD_HASH_ALGORITHM` y se usa para los hashes nuevos; el otro solo
+    verifica hashes antiguos. Un hash de otro algoritmo o con parámetros
+    distintos se recalcula en el siguiente inicio de sesión correcto.
+    """
+    argon2 = Argon2Hasher(
+        time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        memory_cost=settings.PASSWORD_ARGON2_MEMORY_KIB,
+        parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+    bcrypt = BcryptHasher(rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+    hashers = (argon2, bcrypt) if settings.PASSWORD_HASH_ALGORITHM == "argon2" else (bcrypt, argon2)
+    return PasswordHash(hashers)
+
+
+class PasswordHasherPool:
+    """
+    Hash y verificación de contraseñas en un pool de hilos acotado.
+
+    argon2-cffi y bcrypt liberan el GIL mientras calculan, así que los hilos
+    dan paralelismo real sin el coste de serializar a otro proceso, y el
+    bucle de eventos sigue atendiendo el resto de peticiones. Con más de
+    `PASSWORD_HASH_MAX_PENDING` operaciones en cola o en curso se responde
+    503: una avalancha de logins no puede acumular trabajo sin límite.
+    """
+
+    def __init__(self) -> None:
+        self.helper = PasswordHelper(build_password_hash())
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Se crea en el primer uso: con --preload los hilos no deben nacer en el máster.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count(),
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiados inicios de sesión en curso; inténtalo más tarde.",
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(fn, *args)
+        self.pending += 1
+        # Se libera la plaza cuando termina el hilo, no cuando se cancela la petición:
+        # el hash sigue ocupando CPU aunque el cliente se haya ido.
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.helper.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(self.helper.verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasherPool()
+
+metrics.callback(
+    "threadfit_password_hash_pending", "gauge", "Hashes de contraseña en cola o en curso.",
+    lambda: password_hasher.pending,
+)
+metrics.callback(
+    "threadfit_password_hash_rejected_total", "counter", "Operaciones de hash rechazadas con 503 por saturación.",
+    lambda: password_hasher.rejected,
+)
@@ -0,0 +1,287 @@
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import any_, bindparam, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import logger, settings
+from app.db import Comment, Like, Post, async_session, engine
+from app.routes.schemas import PostCreate
+from app.services.background_service import PeriodicTask
+from app.services.serialization_service import POST_COLUMNS
+
+# Columnas de `PostDetail`: las de `PostOut` más los contadores de interacciones.
+POST_DETAIL_COLUMNS = (
+    *POST_COLUMNS,
+    select(func.count()).where(Comment.post_id == Post.id).scalar_subquery().label("comment_count"),
+    select(func.count()).where(Like.post_id == Post.id).scalar_subquery().label("like_count"),
+)
+
+# Candado consultivo del barrido de purgas, común a todos los workers.
+PURGE_LOCK_KEY = 0x7075726765  # "purge"
+
+
+class PostCache:
+    """
+    Caché read-through de posts individuales, por worker, con TTL y LRU.
+
+    Las escrituras de este worker invalidan la entrada al momento; las de otros
+    workers se ven, como mucho, al caducar el TTL. El contador de generación
+    impide guardar una lectura que empezó antes de una invalidación.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[uuid.UUID, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.generation = 0
+
+    def get(self, post_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        entry = self._data.get(post_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._data[post_id]
+            return None
+        self._data.move_to_end(post_id)
+        return entry[1]
+
+    def put(self, post: Dict[str, Any], generation: int) -> None:
+        if generation != self.generation:
+            return
+        self._data[post["id"]] = (time.monotonic() + self.ttl, post)
+        self._data.move_to_end(post["id"])
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, post_id: uuid.UUID) -> None:
+        self.generation += 1
+        self._data.pop(post_id, None)
+
+
+post_cache = PostCache(settings.POST_CACHE_TTL_SECONDS, settings.POST_CACHE_MAX_ENTRIES)
+
+
+async def get_posts_by_ids(db: AsyncSession, post_ids: List[uuid.UUID]) -> Dict[uuid.UUID, Dict[str, Any]]:
+    """
+    Devuelve los posts visibles pedidos, primero de la caché y el resto con
+    una única consulta `WHERE id = ANY(...)`. Los ausentes no aparecen.
+    """
+    found: Dict[uuid.UUID, Dict[str, Any]] = {}
+    misses = []
+    for post_id in post_ids:
+        cached = post_cache.get(post_id)
+        if cached is not None:
+            found[post_id] = cached
+        else:
+            misses.append(post_id)
+    if misses:
+        generation = post_cache.generation
+        ids = bindparam("ids", misses, type_=ARRAY(UUID(as_uuid=True)))
+        rows = await db.execute(
+            select(*POST_DETAIL_COLUMNS).where(Post.id == any_(ids), Post.deleted_at.is_(None))
+        )
+        for row in rows:
+            post = row._asdict()
+            post_cache.put(post, generation)
+            found[post["id"]] = post
+    # Copias: el llamador puede completar campos (p. ej. visitas) sin tocar la caché.
+    return {post_id: dict(post) for post_id, post in found.items()}
+
+
+async def hard_delete_post(db: AsyncSession, post_id: uuid.UUID) -> None:
+    """
+    Borra el post con un único DELETE; comentarios, likes y entradas de
+    timeline se eliminan en la base de datos mediante ON DELETE CASCADE.
+    """
+    await db.execute(delete(Post).where(Post.id == post_id))
+    await db.commit()
+    post_cache.invalidate(post_id)
+
+
+class BulkPostImport:
+    """
+    Creación masiva de posts de un usuario con resultado por elemento.
+
+    Los elementos válidos se acumulan y se insertan en lotes de
+    `POSTS_BULK_CHUNK` con un único INSERT multi-fila ... RETURNING; cada lote
+    se confirma por separado, así que un fallo solo afecta a su lote.
+    """
+
+    def __init__(self, db: AsyncSession, user_id: uuid.UUID) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.results: List[Dict[str, Any]] = []
+        # (id, created_at) de los posts insertados, para el fan-out posterior.
+        self.created: List[Tuple[uuid.UUID, Any]] = []
+        self._pending: List[Tuple[int, Dict[str, Any]]] = []
+
+    @property
+    def received(self) -> int:
+        """Elementos procesados hasta ahora, válidos o no."""
+        return len(self.results) + len(self._pending)
+
+    def reject(self, index: int, errors: Any) -> None:
+        self.results.append({"index": index, "status": "invalid", "errors": errors})
+
+    async def add(self, index: int, item: Any) -> None:
+        """Valida un elemento ya decodificado y lo encola; solo se admiten objetos."""
+        try:
+            post = PostCreate.model_validate(item)
+        except ValidationError as e:
+            self.reject(index, e.errors(include_url=False, include_context=False))
+            return
+        await self._enqueue(index, post)
+
+    async def add_line(self, index: int, line: bytes) -> None:
+        """Valida una línea NDJSON y la encola."""
+        try:
+            post = PostCreate.model_validate_json(line)
+        except ValidationError as e:
+            self.reject(index, e.errors(include_url=False, include_context=False))
+            return
+        await self._enqueue(index, post)
+
+    async def _enqueue(self, index: int, post: PostCreate) -> None:
+        self._pending.append((index, {
+            "id": uuid.uuid4(),
+            "user_id": self.user_id,
+            "title": post.title,
+            "content": post.content,
+            "is_published": post.is_published,
+        }))
+        if len(self._pending) >= settings.POSTS_BULK_CHUNK:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            result = await self.db.execute(
+                insert(Post).values([row for _, row in batch]).returning(Post.id, Post.created_at)
+            )
+            created_at = dict(result.all())
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            logger.exception("Error al insertar un lote de %s posts", len(batch))
+            self.results.extend(
+                {"index": index, "status": "failed", "errors": [{"msg": "Error al insertar el lote."}]}
+                for index, _ in batch
+            )
+            return
+        for index, row in batch:
+            self.created.append((row["id"], created_at[row["id"]]))
+            self.results.append({"index": index, "id": row["id"], "status": "created"})
+
+    def summary(self, truncated: bool = False) -> Dict[str, Any]:
+        self.results.sort(key=lambda r: r["index"])
+        return {
+            "created": len(self.created),
+            "failed": len(self.results) - len(self.created),
+            "truncated": truncated,
+            "results": self.results,
+        }
+
+
+async def _delete_in_chunks(db: AsyncSession, model, post_id: uuid.UUID, *order_by) -> int:
+    """
+    Borra los hijos de un post en lotes, confirmando cada uno para no retener
+    bloqueos. `order_by` fija qué filas van primero en cada lote.
+    """
+    total = 0
+    while True:
+        chunk = (
+            select(model.id)
+            .where(model.post_id == post_id)
+            .order_by(*order_by)
+            .limit(settings.POST_PURGE_CHUNK)
+            .scalar_subquery()
+        )
+        result = await db.execute(delete(model).where(model.id.in_(chunk)))
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < settings.POST_PURGE_CHUNK:
+            return total
+
+
+@asynccontextmanager
+async def _advisory_lock(conn: AsyncConnection, key: Any) -> AsyncIterator[bool]:
+    """
+    Candado consultivo de sesión sobre `conn`. A diferencia del de
+    transacción, sobrevive a los commits por lote y no deja la conexión
+    "idle in transaction" mientras se tiene. Se libera al salir; si no se
+    puede, la conexión se invalida para no devolverla al pool con el candado.
+    """
+    locked = await conn.scalar(select(func.pg_try_advisory_lock(key)))
+    await conn.commit()
+    try:
+        yield locked
+    finally:
+        if locked:
+            try:
+                await conn.scalar(select(func.pg_advisory_unlock(key)))
+                await conn.commit()
+            except BaseException:
+                await conn.invalidate()
+                raise
+
+
+async def _purge_post(conn: AsyncConnection, post_id: uuid.UUID) -> None:
+    # Candado por post: la purga lanzada por la petición y la del barrido no borran a la vez.
+    async with _advisory_lock(conn, func.hashtextextended(str(post_id), 0)) as locked:
+        if not locked:
+            logger.debug("Post %s ya se está purgando en otra tarea", post_id)
+            return
+        async with async_session(bind=conn) as db:
+            try:
+                # Hojas primero: borrar una raíz arrastraría en cascada todo su subárbol en un solo lote.
+                comments = await _delete_in_chunks(db, Comment, post_id, Comment.depth.desc())
+                likes = await _delete_in_chunks(db, Like, post_id)
+                await db.execute(delete(Post).where(Post.id == post_id, Post.deleted_at.is_not(None)))
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+    logger.info("Post %s purgado (%s comentarios, %s likes)", post_id, comments, likes)
+
+
+async def purge_post(post_id: uuid.UUID, conn: Optional[AsyncConnection] = None) -> None:
+    """
+    Elimina en segundo plano un post borrado lógicamente y sus hijos.
+    Es idempotente: si se interrumpe, el barrido periódico lo retoma.
+    """
+    try:
+        if conn is None:
+            async with engine.connect() as conn:
+                await _purge_post(conn, post_id)
+        else:
+            await _purge_post(conn, post_id)
+    except Exception:
+        logger.exception("Error al purgar el post %s", post_id)
+
+
+async def purge_deleted_posts() -> None:
+    """
+    Retoma las purgas pendientes (p. ej. tras un reinicio). Solo barre un
+    worker a la vez: los demás borrarían en paralelo las mismas filas hijas,
+    con esperas de bloqueo e interbloqueos. El candado y todas las purgas
+    del barrido usan una sola conexión.
+    """
+    async with engine.connect() as conn:
+        async with _advisory_lock(conn, PURGE_LOCK_KEY) as locked:
+            if not locked:
+                return
+            pending = (await conn.scalars(select(Post.id).where(Post.deleted_at.is_not(None)))).all()
+            await conn.commit()
+            for post_id in pending:
+                await purge_post(post_id, conn)
+
+
+post_purger = PeriodicTask("posts-purge", settings.POST_PURGE_SWEEP_SECONDS, purge_deleted_posts)
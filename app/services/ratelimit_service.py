@@ -0,0 +1,230 @@
+import math
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Tuple
+
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import logger, settings
+from app.services.admission_service import EXEMPT_PATHS, classify_route
+from app.services.auth_service import decode_access_token
+from app.services.metrics_service import metrics
+from app.services.serialization_service import FastJSONResponse
+
+# Cierre WebSocket por política (límite de peticiones superado).
+WS_POLICY_VIOLATION = 1008
+
+rate_limited = metrics.counter(
+    "threadfit_rate_limited_total",
+    "Peticiones rechazadas con 429, por clase de ruta y tipo de clave (user/ip).",
+)
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float  # segundos hasta poder pagar el coste; 0 si se admite
+    reset: float  # segundos hasta que el cubo vuelve a estar lleno
+
+
+def _result(allowed: bool, tokens: float, cost: float, rate: float, burst: float) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=allowed,
+        remaining=tokens,
+        retry_after=0.0 if allowed else (cost - tokens) / rate,
+        reset=(burst - tokens) / rate,
+    )
+
+
+class MemoryRateLimiter:
+    """
+    Token bucket por clave en memoria del worker, O(1) por petición.
+
+    Cada clave guarda (tokens, instante) y se rellena a `rate` tokens/s hasta
+    `burst`. Las claves se mantienen en orden LRU y, por encima de
+    `max_keys`, se expulsa la más antigua: una clave inactiva ya tendría el
+    cubo lleno, así que olvidarla no cambia el resultado.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, cost: float, rate: float, burst: float) -> RateLimitResult:
+        now = time.monotonic()
+        entry = self._buckets.get(key)
+        if entry is None:
+            tokens = burst
+        else:
+            tokens = min(burst, entry[0] + (now - entry[1]) * rate)
+            self._buckets.move_to_end(key)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return _result(allowed, tokens, cost, rate, burst)
+
+
+# Token bucket atómico en Redis. Usa el reloj del servidor Redis para que
+# todos los workers y pods compartan la misma referencia de tiempo.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = burst
+else
+  tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Token bucket compartido por todo el clúster sobre cualquier servidor con
+    protocolo Redis (Redis, Valkey, KeyDB...). Las claves caducan cuando el
+    cubo se habría rellenado. Si Redis falla se recurre al limitador local.
+    """
+
+    def __init__(self, url: str, fallback: MemoryRateLimiter) -> None:
+        import redis.asyncio as redis  # dependencia opcional
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+        self._fallback = fallback
+
+    async def acquire(self, key: str, cost: float, rate: float, burst: float) -> RateLimitResult:
+        try:
+            allowed, tokens = await self._script(keys=[f"rl:{key}"], args=[rate, burst, cost])
+        except Exception:
+            logger.warning("Redis no disponible para el límite de peticiones; se usa el limitador local.", exc_info=True)
+            return await self._fallback.acquire(key, cost, rate, burst)
+        return _result(bool(allowed), float(tokens), cost, rate, burst)
+
+
+def _build_limiter():
+    memory = MemoryRateLimiter(settings.RATE_LIMIT_MAX_KEYS)
+    if settings.REDIS_URL:
+        try:
+            return RedisRateLimiter(settings.REDIS_URL, memory)
+        except ImportError:
+            logger.warning("REDIS_URL definido pero el paquete 'redis' no está instalado; límites por worker.")
+    return memory
+
+
+limiter = _build_limiter()
+
+
+def route_cost(route_class: str) -> int:
+    return getattr(settings, f"RATE_LIMIT_COST_{route_class.upper()}")
+
+
+def client_ip(conn: HTTPConnection) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = conn.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return conn.client.host if conn.client else "unknown"
+
+
+def rate_limit_key(conn: HTTPConnection) -> Tuple[str, str]:
+    """
+    Clave del cubo: el usuario de la cookie de sesión si el token es válido
+    (solo se verifica la firma, sin consultar la base de datos) o, si no, la IP.
+    """
+    token = conn.cookies.get(settings.COOKIE_NAME)
+    if token:
+        try:
+            return "user", f"user:{decode_access_token(token)}"
+        except ValueError:
+            pass
+    return "ip", f"ip:{client_ip(conn)}"
+
+
+def rate_limit_headers(result: RateLimitResult, rate: float, burst: float) -> dict:
+    headers = {
+        "RateLimit-Limit": str(int(burst)),
+        "RateLimit-Remaining": str(max(0, math.floor(result.remaining))),
+        "RateLimit-Reset": str(math.ceil(result.reset)),
+        "RateLimit-Policy": f"{int(burst)};w={math.ceil(burst / rate)}",
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de límite de peticiones con coste por clase de ruta:
+    una generación sintética o una exportación gasta muchos más tokens que
+    leer el feed. Añade las cabeceras `RateLimit-*` a todas las respuestas y
+    rechaza con 429 (o cierra el WebSocket con 1008) cuando no hay tokens.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] not in ("http", "websocket")
+            or not settings.RATE_LIMIT_ENABLED
+            or scope["path"] == "/"
+            or scope["path"].startswith(EXEMPT_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        conn = HTTPConnection(scope)
+        key_type, key = rate_limit_key(conn)
+        if key_type == "user":
+            rate, burst = settings.RATE_LIMIT_USER_RATE, settings.RATE_LIMIT_USER_BURST
+        else:
+            rate, burst = settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST
+        route_class = classify_route(scope.get("method", "GET"), scope["path"])
+        # Un coste mayor que la ráfaga nunca se podría pagar.
+        cost = min(route_cost(route_class), burst)
+        result = await limiter.acquire(key, cost, rate, burst)
+        headers = rate_limit_headers(result, rate, burst)
+
+        if not result.allowed:
+            rate_limited.inc(route_class=route_class, key_type=key_type)
+            logger.debug("Límite de peticiones superado para %s en %s", key, scope["path"])
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": WS_POLICY_VIOLATION})
+                return
+            response = FastJSONResponse(
+                {"detail": "Demasiadas peticiones; inténtalo más tarde."},
+                status_code=429,
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            await self.app(scope, receive, send)
+            return
+
+        raw_headers = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *raw_headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
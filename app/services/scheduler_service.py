@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Dict, Final, Optional
+
+# Intervalo objetivo entre lotes en modo de ritmo constante. Con ritmos bajos
+# el lote se reduce para que las filas salgan repartidas y no a ráfagas.
+TICK_SECONDS: Final[float] = 0.1
+
+
+class GenerationScheduler:
+    """
+    Planificador tipo token bucket para la generación sintética.
+
+    Con `rate` (filas/segundo) libera lotes al ritmo objetivo; sin `rate`
+    funciona en modo sin límite y entrega lotes completos de inmediato,
+    pensado para la siembra masiva de datos.
+    """
+
+    def __init__(self, rate: Optional[float], batch_size: int) -> None:
+        self.rate = rate
+        self.batch_size = batch_size
+        self.completed = 0
+        self._started = time.monotonic()
+        self._updated = self._started
+        self._tokens = float(self._batch_limit()) if rate else 0.0
+
+    def _batch_limit(self) -> int:
+        if not self.rate:
+            return self.batch_size
+        return max(1, min(self.batch_size, int(self.rate * TICK_SECONDS)))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        capacity = self._batch_limit()
+        self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, remaining: int) -> int:
+        """
+        Espera hasta que se pueda liberar el siguiente lote y devuelve su tamaño.
+        """
+        size = min(self._batch_limit(), remaining)
+        if not self.rate or size <= 0:
+            return size
+        self._refill()
+        if self._tokens < size:
+            await asyncio.sleep((size - self._tokens) / self.rate)
+            self._refill()
+        self._tokens -= size
+        return size
+
+    def record(self, count: int) -> None:
+        """Registra filas ya generadas para el cálculo de ritmo y retraso."""
+        self.completed += count
+
+    def progress(self) -> Dict[str, Optional[float]]:
+        """
+        Ritmo conseguido (filas/segundo), ritmo objetivo y retraso en segundos
+        respecto al calendario ideal (0 si se va al día o sin límite).
+        """
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        lag = 0.0
+        if self.rate:
+            lag = max(0.0, elapsed - self.completed / self.rate)
+        return {
+            "rate": round(self.completed / elapsed, 2),
+            "target_rate": self.rate,
+            "lag": round(lag, 3),
+        }
@@ -0,0 +1,79 @@
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, exists, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import Comment, Post
+from app.db.models import TS_CONFIG
+from app.services.serialization_service import (
+    COMMENT_COLUMNS,
+    POST_COLUMNS,
+    decode_cursor,
+    encode_cursor,
+    rows_to_dicts,
+)
+
+# TS_CONFIG está validado en Settings, por lo que puede ir como literal.
+REGCONFIG = literal_column(f"'{TS_CONFIG}'::regconfig")
+# Opciones de ts_headline: fragmentos cortos con las coincidencias marcadas.
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<mark>, StopSel=</mark>"
+
+
+def _decode_search_cursor(cursor: str) -> Tuple[float, uuid.UUID]:
+    data = decode_cursor(cursor)
+    try:
+        return float(data["r"]), uuid.UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de búsqueda no válido.",
+        )
+
+
+async def _search(
+    db: AsyncSession,
+    model,
+    columns,
+    q: str,
+    limit: int,
+    cursor: Optional[str],
+    *filters,
+) -> Dict[str, Any]:
+    """
+    Búsqueda ordenada por relevancia con paginación por cursor (rank, id).
+    El índice GIN resuelve las coincidencias; ts_headline solo se calcula para
+    las filas de la página, en la consulta exterior.
+    """
+    query = func.websearch_to_tsquery(REGCONFIG, q)
+    rank = func.ts_rank_cd(model.search_vector, query)
+
+    page = select(*columns, rank.label("rank")).where(model.search_vector.op("@@")(query), *filters)
+    if cursor:
+        last_rank, last_id = _decode_search_cursor(cursor)
+        page = page.where(or_(rank < last_rank, and_(rank == last_rank, model.id > last_id)))
+    page = page.order_by(rank.desc(), model.id).limit(limit + 1).subquery()
+
+    stmt = select(
+        page,
+        func.ts_headline(REGCONFIG, page.c.content, query, HEADLINE_OPTIONS).label("snippet"),
+    ).order_by(page.c.rank.desc(), page.c.id)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"r": rows[-1].rank, "id": rows[-1].id})
+    return {"results": rows_to_dicts(rows), "next_cursor": next_cursor}
+
+
+async def search_posts(db: AsyncSession, q: str, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+    return await _search(db, Post, POST_COLUMNS, q, limit, cursor, Post.deleted_at.is_(None))
+
+
+async def search_comments(db: AsyncSession, q: str, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+    return await _search(
+        db, Comment, COMMENT_COLUMNS, q, limit, cursor,
+        exists().where(Post.id == Comment.post_id, Post.deleted_at.is_(None)),
+    )
@@ -0,0 +1,113 @@
+import base64
+from math import ceil
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
+
+from app.db import Comment, Post
+from app.services.tracing_service import span
+
+# Columnas que forman un `PostOut`. Seleccionarlas directamente evita
+# materializar objetos ORM (y sus relaciones) en los listados.
+POST_COLUMNS = (
+    Post.id,
+    Post.title,
+    Post.content,
+    Post.is_published,
+    Post.views,
+    Post.user_id,
+    Post.created_at,
+    Post.updated_at,
+)
+
+POST_FIELDS = {column.key: column for column in POST_COLUMNS}
+
+# Columnas que forman un `CommentOut`.
+COMMENT_COLUMNS = (
+    Comment.id,
+    Comment.content,
+    Comment.user_id,
+    Comment.post_id,
+    Comment.created_at,
+    Comment.parent_id,
+    Comment.depth,
+    Comment.reply_count,
+)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada con orjson.
+    Se usa con payloads ya construidos a partir de filas, sin pasar por la
+    revalidación de Pydantic del `response_model`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        # default=str cubre tipos propios del driver, como el UUID de asyncpg.
+        with span("serialize"):
+            return orjson.dumps(content, default=str)
+
+
+def select_post_columns(fields: Optional[str] = None, excerpt_len: Optional[int] = None) -> Tuple[Any, ...]:
+    """
+    Columnas de post para un listado con `fields=` (separados por comas) y
+    `excerpt_len=`. El `id` se incluye siempre; el contenido se recorta en la
+    base de datos con `left()` para no leer ni enviar el texto completo.
+    """
+    if fields:
+        names = ["id", *(name.strip() for name in fields.split(",") if name.strip())]
+        unknown = sorted({name for name in names if name not in POST_FIELDS})
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos no válidos: {', '.join(unknown)}. Disponibles: {', '.join(POST_FIELDS)}.",
+            )
+        columns = [POST_FIELDS[name] for name in dict.fromkeys(names)]
+    else:
+        columns = list(POST_COLUMNS)
+    if excerpt_len is not None:
+        columns = [
+            func.left(column, excerpt_len).label("content") if column.key == "content" else column
+            for column in columns
+        ]
+    return tuple(columns)
+
+
+def rows_to_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Convierte filas de un `select` de columnas en diccionarios."""
+    return [row._asdict() for row in rows]
+
+
+def paginated_posts_payload(rows: Iterable[Any], total: int, page: int, per_page: int) -> Dict[str, Any]:
+    """Construye el cuerpo de `PaginatedPostsResponse` directamente desde filas."""
+    return {
+        "posts": rows_to_dicts(rows),
+        "total": total,
+        "pages": ceil(total / per_page) if per_page else 1,
+        "current_page": page,
+        "per_page": per_page,
+        "has_next": (page * per_page) < total,
+        "has_prev": page > 1,
+    }
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Codifica los valores de una clave de paginación como cursor opaco."""
+    return base64.urlsafe_b64encode(orjson.dumps(values, default=str)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decodifica un cursor opaco; responde 400 si no es válido."""
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación no válido.",
+        )
+    return data
@@ -1,17 +1,323 @@
+import asyncio
+import hashlib
+import math
+import random
+import secrets
+import string
 import uuid
-from app.db import Batch, Post, Comment
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Final, List, Optional, Sequence, Tuple
+
+from app.db import Batch, Post, Comment, Like, User
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from app.services.auth_service import get_user_manager
-from app.routes.schemas import UserCreate
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from app.services.auth_service import UserManager
+from app.services.comments_service import root_comment_fields
+from app.services.password_service import password_hasher
+from app.routes.schemas import CountDistribution, GraphRequest, UserCreate
+from app.config import settings, logger
+
+# Tamaño fijo de cada trozo de generación. Forma parte de la derivación de
+# semillas, por lo que cambiarlo altera los datos producidos por una semilla.
+CHUNK_SIZE: Final[int] = 1000
+EMAIL_DOMAINS: Final[Tuple[str, ...]] = ("example.com", "example.org", "example.net")
+PASSWORD_ALPHABET: Final[str] = string.ascii_letters + string.digits
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def derive_seed(seed: int, *stream: object) -> int:
+    """
+    Deriva una semilla independiente de 64 bits para un flujo concreto
+    (p. ej. tipo de fila e índice de trozo) a partir de la semilla de la petición.
+    """
+    material = ":".join([str(seed), *map(str, stream)]).encode()
+    return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "big")
+
+
+@lru_cache(maxsize=1)
+def _vocabulary() -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Tablas de vocabulario precalculadas a partir de los proveedores de Faker.
+    Se construyen una sola vez por proceso.
+    """
+    from faker.providers.lorem.en_US import Provider as LoremProvider
+    from faker.providers.person.en_US import Provider as PersonProvider
+
+    words = tuple(LoremProvider.word_list)
+    first_names = tuple(name.lower() for name in PersonProvider.first_names)
+    last_names = tuple(name.lower() for name in PersonProvider.last_names)
+    return words, first_names, last_names
+
+
+class SyntheticGenerator:
+    """
+    Generador determinista de datos sintéticos.
+    Cada instancia tiene su propio flujo aleatorio, de modo que las peticiones
+    concurrentes no se interfieren y una semilla reproduce siempre los mismos datos.
+    """
+
+    def __init__(self, seed: Optional[int] = None, *stream: object) -> None:
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        self._rng = random.Random(derive_seed(self.seed, *stream))
+        self._words, self._first_names, self._last_names = _vocabulary()
+
+    def spawn(self, *stream: object) -> "SyntheticGenerator":
+        """Crea un generador hijo con un flujo independiente derivado de la misma semilla."""
+        return SyntheticGenerator(self.seed, *stream)
+
+    @property
+    def rng(self) -> random.Random:
+        return self._rng
+
+    def sentence(self, nb_words: int = 6) -> str:
+        nb_words = max(1, nb_words + self._rng.randint(-2, 3))
+        return " ".join(self._rng.choices(self._words, k=nb_words)).capitalize() + "."
+
+    def paragraph(self, nb_sentences: int = 3) -> str:
+        nb_sentences = max(1, nb_sentences + self._rng.randint(-1, 2))
+        return " ".join(self.sentence() for _ in range(nb_sentences))
+
+    def email(self) -> str:
+        first = self._rng.choice(self._first_names)
+        last = self._rng.choice(self._last_names)
+        domain = self._rng.choice(EMAIL_DOMAINS)
+        return f"{first}.{last}{self._rng.randrange(100000)}@{domain}"
+
+    def password(self, length: int = 10) -> str:
+        return "".join(self._rng.choices(PASSWORD_ALPHABET, k=length))
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self._rng.getrandbits(128), version=4)
+
+    def row(self, kind: str) -> Dict[str, Any]:
+        """Genera los campos de una fila del tipo indicado (`user`, `post` o `comment`)."""
+        if kind == "user":
+            return {"email": self.email(), "password": self.password()}
+        if kind == "post":
+            return {"title": self.sentence(), "content": self.paragraph()}
+        if kind == "comment":
+            return {"content": self.sentence()}
+        raise ValueError(f"Tipo de fila desconocido: {kind}")
+
+
+def _build_chunk(kind: str, seed: int, chunk_index: int, size: int) -> List[Dict[str, Any]]:
+    """Genera un trozo de filas. Se ejecuta en el pool de procesos."""
+    generator = SyntheticGenerator(seed, kind, chunk_index)
+    return [generator.row(kind) for _ in range(size)]
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.SYNTHETIC_PROCESS_WORKERS or None
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Detiene el pool de procesos de generación si se llegó a crear."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def generate_rows(kind: str, amount: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Genera `amount` filas del tipo indicado.
+    Las filas se dividen en trozos de CHUNK_SIZE, cada uno con su propia semilla
+    derivada, y los trozos se generan en paralelo en un pool de procesos.
+    El resultado depende solo de la semilla, no de la concurrencia.
+    """
+    if amount <= 0:
+        return []
+    seed = seed if seed is not None else secrets.randbits(64)
+    sizes = [min(CHUNK_SIZE, amount - start) for start in range(0, amount, CHUNK_SIZE)]
+    if len(sizes) == 1:
+        return _build_chunk(kind, seed, 0, amount)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_process_pool()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(pool, _build_chunk, kind, seed, index, size)
+        for index, size in enumerate(sizes)
+    ))
+    return [row for chunk in chunks for row in chunk]
+
+
+def sample_count(distribution: CountDistribution, rng: random.Random) -> int:
+    """Extrae un número de hijos según la distribución indicada."""
+    if distribution.kind == "fixed":
+        return distribution.min
+    if distribution.kind == "uniform":
+        return rng.randint(distribution.min, distribution.max)
+    mean = distribution.mean if distribution.mean is not None else (distribution.min + distribution.max) / 2
+    return min(distribution.max, max(distribution.min, _poisson(mean, rng)))
+
+
+def _poisson(mean: float, rng: random.Random) -> int:
+    if mean <= 0:
+        return 0
+    if mean > 30:
+        # Aproximación normal: suficiente para datos sintéticos y O(1).
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
 
-from faker import Faker
+def _random_datetime(rng: random.Random, start: datetime, span_seconds: float) -> datetime:
+    return start + timedelta(seconds=rng.random() * span_seconds)
 
-fake = Faker()
 
-def set_fake_seed(seed: int | None):
-    if seed is not None:
-        fake.seed_instance(seed)
+async def _bulk_insert(db: AsyncSession, model, rows: Sequence[Dict[str, Any]]) -> None:
+    """Inserta filas en bloques con INSERT multi-fila, sin pasar por la unidad de trabajo del ORM."""
+    step = settings.SYNTHETIC_INSERT_CHUNK
+    for start in range(0, len(rows), step):
+        await db.execute(insert(model.__table__), rows[start:start + step])
+
+
+async def generate_graph(db: AsyncSession, spec: GraphRequest, batch_id: str) -> Dict[str, Any]:
+    """
+    Genera un grafo completo usuarios → posts → comentarios → likes.
+
+    Todas las claves foráneas se resuelven en memoria (los ids se derivan de la
+    semilla) y la carga se hace por bloques en orden de dependencias. Los
+    usuarios se insertan y confirman primero; después, por cada trozo de
+    usuarios, se generan, insertan y confirman sus posts, comentarios y
+    likes, de modo que ni el grafo entero se mantiene en memoria ni la carga
+    ocupa una única transacción enorme. Si falla a mitad, los trozos ya
+    confirmados se conservan y el error indica cuántas filas se cargaron.
+    """
+    seed = spec.seed if spec.seed is not None else secrets.randbits(64)
+    root = SyntheticGenerator(seed, "graph")
+    end = spec.end_date or datetime.now(timezone.utc)
+    start = spec.start_date or end - timedelta(days=30)
+    span = (end - start).total_seconds()
+
+    # Un único hash para todos los usuarios del grafo: hashear 100k contraseñas
+    # dominaría el tiempo de carga y no aporta nada a unos datos sintéticos.
+    password = root.password(12)
+    hashed_password = await password_hasher.hash(password)
+
+    user_ids = [root.uuid() for _ in range(spec.num_users)]
+    totals = {"users": 0, "posts": 0, "comments": 0, "likes": 0}
+    try:
+        user_fields = await generate_rows("user", spec.num_users, derive_seed(seed, "users"))
+        user_rows = []
+        for user_id, fields in zip(user_ids, user_fields):
+            local, domain = fields["email"].split("@", 1)
+            user_rows.append({
+                "id": user_id,
+                "email": f"{local}.{user_id.hex[:8]}@{domain}",
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "is_superuser": False,
+                "is_verified": False,
+            })
+        await _bulk_insert(db, User, user_rows)
+        await db.commit()
+        totals["users"] = len(user_rows)
+        del user_rows, user_fields
+
+        for chunk_index, first in enumerate(range(0, spec.num_users, CHUNK_SIZE)):
+            counts = await _insert_graph_chunk(
+                db, spec, seed, chunk_index, user_ids, user_ids[first:first + CHUNK_SIZE],
+                batch_id, start, end, span,
+            )
+            await db.commit()
+            for key, value in counts.items():
+                totals[key] += value
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El grafo choca con datos existentes (¿semilla repetida?) tras confirmar {totals}: {e.orig}",
+        )
+    except Exception as e:
+        await db.rollback()
+        logger.exception("Error al generar el grafo sintético")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar el grafo tras confirmar {totals}: {e}",
+        )
+    return {"seed": seed, "password": password, **totals}
+
+
+async def _insert_graph_chunk(
+    db: AsyncSession,
+    spec: GraphRequest,
+    seed: int,
+    chunk_index: int,
+    all_user_ids: List[uuid.UUID],
+    author_ids: List[uuid.UUID],
+    batch_id: str,
+    start: datetime,
+    end: datetime,
+    span: float,
+) -> Dict[str, int]:
+    """Genera e inserta los posts, comentarios y likes de un trozo de autores."""
+    structure = SyntheticGenerator(seed, "graph", "structure", chunk_index)
+    rng = structure.rng
+
+    posts = []
+    for author_id in author_ids:
+        for _ in range(sample_count(spec.posts_per_user, rng)):
+            created_at = _random_datetime(rng, start, span)
+            posts.append({
+                "id": structure.uuid(),
+                "user_id": author_id,
+                "is_published": True,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+
+    comments, likes = [], []
+    for post in posts:
+        remaining = (end - post["created_at"]).total_seconds()
+        for _ in range(sample_count(spec.comments_per_post, rng)):
+            comment_id = structure.uuid()
+            comments.append({
+                "id": comment_id,
+                "post_id": post["id"],
+                "user_id": rng.choice(all_user_ids),
+                **root_comment_fields(comment_id, _random_datetime(rng, post["created_at"], remaining)),
+            })
+        amount = min(len(all_user_ids), sample_count(spec.likes_per_post, rng))
+        if amount:
+            for liker_id in rng.sample(all_user_ids, amount):
+                likes.append({
+                    "id": structure.uuid(),
+                    "post_id": post["id"],
+                    "user_id": liker_id,
+                    "batch_id": uuid.UUID(batch_id),
+                    "created_at": _random_datetime(rng, post["created_at"], remaining),
+                })
+
+    post_fields, comment_fields = await asyncio.gather(
+        generate_rows("post", len(posts), derive_seed(seed, "posts", chunk_index)),
+        generate_rows("comment", len(comments), derive_seed(seed, "comments", chunk_index)),
+    )
+    for post, fields in zip(posts, post_fields):
+        post.update(fields)
+    for comment, fields in zip(comments, comment_fields):
+        comment.update(fields)
+
+    await _bulk_insert(db, Post, posts)
+    await _bulk_insert(db, Comment, comments)
+    await _bulk_insert(db, Like, likes)
+    return {"posts": len(posts), "comments": len(comments), "likes": len(likes)}
+
 
 async def create_batch(db: AsyncSession, user_id: str) -> str:
     batch_id = str(uuid.uuid4())
@@ -27,70 +333,92 @@ async def create_batch(db: AsyncSession, user_id: str) -> str:
         )
     return batch_id
 
-async def create_fake_user(
+async def create_fake_users(
     db: AsyncSession,
+    rows: Sequence[Dict[str, Any]],
     user_manager=None,
-) -> dict:
-    user_data = {
-        "email": fake.email(),
-        "password": fake.password(length=10),
-    }
+) -> List[dict]:
+    """
+    Registra un lote de usuarios. Cada alta pasa por FastAPI Users para que la
+    contraseña quede hasheada igual que en un registro normal.
+    """
     if user_manager is None:
-        async for um in get_user_manager():
-            user_manager = um
-            break
+        user_manager = UserManager(SQLAlchemyUserDatabase(db, User), password_hasher.helper)
 
-    user_create = UserCreate(**user_data)
-    try:
-        user = await user_manager.create(user_create, safe=True, request=None)
-    except Exception as e:
-        raise RuntimeError(f"Error al crear usuario con FastAPI Users: {e}")
-
-    return {
-        "id": str(user.id),
-        "email": user.email,
-        "password": user_data["password"],
-    }
-
-async def create_fake_post(db: AsyncSession, user_id: str) -> dict:
-    post_data = {
-        "title": fake.sentence(),
-        "content": fake.paragraph(),
-        "is_published": True,
-        "user_id": user_id,
-    }
-    new_post = Post(**post_data)
-    db.add(new_post)
+    created = []
+    for user_data in rows:
+        user_create = UserCreate(**user_data)
+        try:
+            user = await user_manager.create(user_create, safe=True, request=None)
+        except Exception as e:
+            raise RuntimeError(f"Error al crear usuario con FastAPI Users: {e}")
+        created.append({
+            "id": str(user.id),
+            "email": user.email,
+            "password": user_data["password"],
+        })
+    return created
+
+
+async def create_fake_posts(
+    db: AsyncSession,
+    user_id: str,
+    rows: Sequence[Dict[str, Any]],
+) -> List[dict]:
+    """Inserta un lote de publicaciones con un único INSERT multi-fila y un commit."""
+    post_rows = [
+        {**fields, "id": uuid.uuid4(), "is_published": True, "user_id": uuid.UUID(str(user_id))}
+        for fields in rows
+    ]
     try:
+        await _bulk_insert(db, Post, post_rows)
         await db.commit()
-        await db.refresh(new_post)
+    except IntegrityError:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
         raise RuntimeError(f"Error al crear publicación: {e}")
-    return {
-        "id": str(new_post.id),
-        "title": new_post.title,
-        "content": new_post.content,
-        "user_id": str(new_post.user_id),
-    }
-
-async def create_fake_comment(db: AsyncSession, user_id: str, post_id: str) -> dict:
-    comment_data = {
-        "content": fake.sentence(),
-        "post_id": post_id,
-        "user_id": user_id,
-    }
-    new_comment = Comment(**comment_data)
-    db.add(new_comment)
+    return [
+        {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "content": row["content"],
+            "user_id": str(row["user_id"]),
+        }
+        for row in post_rows
+    ]
+
+
+async def create_fake_comments(
+    db: AsyncSession,
+    user_id: str,
+    post_id: str,
+    rows: Sequence[Dict[str, Any]],
+) -> List[dict]:
+    """Inserta un lote de comentarios con un único INSERT multi-fila y un commit."""
+    comment_rows = []
+    for fields in rows:
+        comment_id = uuid.uuid4()
+        comment_rows.append({
+            **fields,
+            **root_comment_fields(comment_id),
+            "id": comment_id,
+            "post_id": uuid.UUID(str(post_id)),
+            "user_id": uuid.UUID(str(user_id)),
+        })
     try:
+        await _bulk_insert(db, Comment, comment_rows)
         await db.commit()
-        await db.refresh(new_comment)
     except Exception as e:
         await db.rollback()
         raise RuntimeError(f"Error al crear comentario: {e}")
-    return {
-        "id": str(new_comment.id),
-        "content": new_comment.content,
-        "post_id": str(new_comment.post_id),
-        "user_id": str(new_comment.user_id),
-    }
\ No newline at end of file
+    return [
+        {
+            "id": str(row["id"]),
+            "content": row["content"],
+            "post_id": str(row["post_id"]),
+            "user_id": str(row["user_id"]),
+        }
+        for row in comment_rows
+    ]
@@ -0,0 +1,201 @@
+import heapq
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, column, delete, literal, select, true, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import logger, settings
+from app.db import Follow, Post, TimelineEntry, User, async_session
+from app.services.serialization_service import POST_COLUMNS, decode_cursor, encode_cursor, rows_to_dicts
+
+
+def _is_celebrity(followers_count: int) -> bool:
+    """Los autores con muchos seguidores se leen en el momento (fan-out en lectura)."""
+    return followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+async def fan_out_post(post_id: uuid.UUID, author_id: uuid.UUID, created_at: datetime) -> None:
+    """
+    Copia un post recién creado en el timeline de sus seguidores y del propio autor.
+    Se ejecuta en segundo plano, con su propia sesión, tras responder al cliente.
+    """
+    await fan_out_posts([(post_id, created_at)], author_id)
+
+
+async def fan_out_posts(posts: List[Tuple[uuid.UUID, datetime]], author_id: uuid.UUID) -> None:
+    """
+    Reparte varios posts del mismo autor con un único INSERT ... SELECT
+    (seguidores x posts), como hace la creación masiva.
+    """
+    if not posts:
+        return
+    new_posts = values(
+        column("post_id", PG_UUID(as_uuid=True)),
+        column("created_at", DateTime(timezone=True)),
+        name="new_posts",
+    ).data(posts)
+    async with async_session() as db:
+        try:
+            followers_count = await db.scalar(select(User.followers_count).where(User.id == author_id))
+            recipients = select(literal(author_id).label("user_id"))
+            if not _is_celebrity(followers_count or 0):
+                recipients = recipients.union_all(
+                    select(Follow.follower_id).where(Follow.followee_id == author_id)
+                )
+            recipients = recipients.subquery()
+            await db.execute(
+                insert(TimelineEntry).from_select(
+                    ["user_id", "created_at", "post_id", "author_id"],
+                    select(
+                        recipients.c.user_id,
+                        new_posts.c.created_at,
+                        new_posts.c.post_id,
+                        literal(author_id),
+                    ).select_from(recipients.join(new_posts, true())),
+                ).on_conflict_do_nothing()
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("Error al repartir %s post(s) del autor %s en los timelines", len(posts), author_id)
+
+
+async def follow_user(db: AsyncSession, follower_id: uuid.UUID, followee_id: uuid.UUID) -> None:
+    """
+    Registra el seguimiento, actualiza el contador de seguidores y rellena el
+    timeline del seguidor con los posts recientes del autor.
+    """
+    if follower_id == followee_id:
+        raise HTTPException(status_code=400, detail="No puedes seguirte a ti mismo.")
+    followers_count = await db.scalar(select(User.followers_count).where(User.id == followee_id))
+    if followers_count is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado.")
+
+    db.add(Follow(follower_id=follower_id, followee_id=followee_id))
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Ya sigues a este usuario.")
+
+    await db.execute(
+        update(User)
+        .where(User.id == followee_id)
+        .values(followers_count=User.followers_count + 1)
+    )
+    if not _is_celebrity(followers_count + 1):
+        recent = (
+            select(
+                literal(follower_id),
+                Post.created_at,
+                Post.id,
+                Post.user_id,
+            )
+            .where(Post.user_id == followee_id)
+            .order_by(Post.created_at.desc())
+            .limit(settings.TIMELINE_BACKFILL_POSTS)
+        )
+        await db.execute(
+            insert(TimelineEntry).from_select(
+                ["user_id", "created_at", "post_id", "author_id"], recent
+            ).on_conflict_do_nothing()
+        )
+    await db.commit()
+
+
+async def unfollow_user(db: AsyncSession, follower_id: uuid.UUID, followee_id: uuid.UUID) -> None:
+    """Elimina el seguimiento y las entradas del autor en el timeline del seguidor."""
+    result = await db.execute(
+        delete(Follow).where(Follow.follower_id == follower_id, Follow.followee_id == followee_id)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="No sigues a este usuario.")
+    await db.execute(
+        update(User)
+        .where(User.id == followee_id)
+        .values(followers_count=User.followers_count - 1)
+    )
+    await db.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id,
+            TimelineEntry.author_id == followee_id,
+        )
+    )
+    await db.commit()
+
+
+def _decode_timeline_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    if not cursor:
+        return None
+    data = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(data["t"]), uuid.UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de timeline no válido.",
+        )
+
+
+async def get_home_timeline(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    cursor: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Timeline del usuario, del más reciente al más antiguo.
+
+    Los posts repartidos en escritura se leen con un recorrido de rango sobre la
+    clave primaria de `timeline_entries`. Los de autores seguidos con demasiados
+    seguidores para el fan-out se leen en el momento y se mezclan por fecha.
+    """
+    after = _decode_timeline_cursor(cursor)
+
+    stmt = (
+        select(*POST_COLUMNS)
+        .join(TimelineEntry, TimelineEntry.post_id == Post.id)
+        .where(TimelineEntry.user_id == user_id, Post.deleted_at.is_(None))
+        .order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+        .limit(limit + 1)
+    )
+    if after:
+        stmt = stmt.where(tuple_(TimelineEntry.created_at, TimelineEntry.post_id) < after)
+    rows: List[Any] = list((await db.execute(stmt)).all())
+
+    celebrities = (
+        select(Follow.followee_id)
+        .join(User, User.id == Follow.followee_id)
+        .where(
+            Follow.follower_id == user_id,
+            User.followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+        )
+    )
+    celebrity_stmt = (
+        select(*POST_COLUMNS)
+        .where(Post.user_id.in_(celebrities), Post.deleted_at.is_(None))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+    if after:
+        celebrity_stmt = celebrity_stmt.where(tuple_(Post.created_at, Post.id) < after)
+    celebrity_rows = (await db.execute(celebrity_stmt)).all()
+    if celebrity_rows:
+        seen = {row.id for row in rows}
+        rows = list(heapq.merge(
+            rows,
+            (row for row in celebrity_rows if row.id not in seen),
+            key=lambda row: (row.created_at, row.id),
+            reverse=True,
+        ))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"t": rows[-1].created_at.isoformat(), "id": rows[-1].id})
+    return {"posts": rows_to_dicts(rows), "next_cursor": next_cursor}
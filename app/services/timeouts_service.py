@@ -0,0 +1,124 @@
+import asyncio
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import logger, settings
+from app.db import statement_timeout_ms
+from app.services.admission_service import classify_route
+from app.services.metrics_service import metrics
+from app.services.serialization_service import FastJSONResponse
+
+# SQLSTATE de Postgres para sentencias canceladas (statement_timeout o cancelación).
+QUERY_CANCELED = "57014"
+
+# Solo se abandonan peticiones sin efectos: cortar una escritura a medias
+# dejaría al cliente sin saber si se aplicó.
+CANCELLABLE_METHODS = frozenset({"GET", "HEAD"})
+
+statement_timeouts = metrics.counter(
+    "threadfit_statement_timeouts_total",
+    "Consultas canceladas por statement_timeout, por clase de ruta.",
+)
+client_disconnects = metrics.counter(
+    "threadfit_cancelled_on_disconnect_total",
+    "Peticiones canceladas porque el cliente se desconectó, por clase de ruta.",
+)
+
+
+def statement_budget_ms(route_class: str) -> int:
+    return getattr(settings, f"STATEMENT_TIMEOUT_{route_class.upper()}_MS")
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    return getattr(getattr(exc, "orig", None), "sqlstate", None) == QUERY_CANCELED
+
+
+async def statement_timeout_handler(request: Request, exc: DBAPIError):
+    """Traduce las consultas canceladas por `statement_timeout` a 504; el resto sigue siendo un 500."""
+    if not is_statement_timeout(exc):
+        raise exc
+    route_class = classify_route(request.method, request.url.path)
+    statement_timeouts.inc(route_class=route_class)
+    logger.warning("Consulta cancelada por statement_timeout en %s %s", request.method, request.url.path)
+    return FastJSONResponse(
+        {"detail": "La consulta ha superado el tiempo máximo permitido."},
+        status_code=504,
+    )
+
+
+class StatementBudgetMiddleware:
+    """
+    Middleware ASGI que fija el `statement_timeout` de la petición según su
+    clase de ruta (ver `BudgetedSession`) y, en GET/HEAD, cancela el handler
+    si el cliente se desconecta antes de recibir la respuesta. La cancelación
+    llega a asyncpg, que cancela la consulta en el servidor y libera la
+    conexión del pool.
+
+    El presupuesto vale hasta que se envía la respuesta: las tareas de fondo
+    (`BackgroundTasks`, que Starlette ejecuta después, todavía dentro de esta
+    llamada) corren sin límite, como fuera de una petición.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify_route(scope["method"], scope["path"])
+        token = statement_timeout_ms.set(statement_budget_ms(route_class))
+
+        async def send_then_unbudget(message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                statement_timeout_ms.set(0)
+
+        try:
+            if settings.CANCEL_ON_DISCONNECT and scope["method"] in CANCELLABLE_METHODS:
+                await self._run_cancellable(scope, receive, send_then_unbudget, route_class)
+            else:
+                await self.app(scope, receive, send_then_unbudget)
+        finally:
+            statement_timeout_ms.reset(token)
+
+    async def _run_cancellable(self, scope: Scope, receive: Receive, send: Send, route_class: str) -> None:
+        response_done = False
+
+        async def tracking_send(message) -> None:
+            nonlocal response_done
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_done = True
+            await send(message)
+
+        # El vigilante es el único que lee de `receive`; reenvía los mensajes al handler.
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def watch_disconnect() -> None:
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        handler = asyncio.create_task(self.app(scope, messages.get, tracking_send))
+        watcher = asyncio.create_task(watch_disconnect())
+        abandoned = False
+        try:
+            await asyncio.wait({handler, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            # Tras una respuesta completa el servidor también notifica la
+            # desconexión; entonces el handler solo ejecuta tareas de fondo.
+            if not handler.done() and not response_done:
+                abandoned = True
+                handler.cancel()
+                client_disconnects.inc(route_class=route_class)
+                logger.info("Cliente desconectado; se cancela %s %s", scope["method"], scope["path"])
+            await handler
+        except asyncio.CancelledError:
+            if not abandoned:
+                handler.cancel()
+                raise
+        finally:
+            watcher.cancel()
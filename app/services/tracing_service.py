@@ -0,0 +1,267 @@
+import os
+import random
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, List
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import get_logger, settings
+from app.db import engine
+
+logger = get_logger("tracing")
+
+# Se rellenan en `setup_tracing`; con las trazas desactivadas, OpenTelemetry
+# ni siquiera se importa y los helpers devuelven un contexto vacío.
+_trace: Any = None
+_context: Any = None
+_propagate: Any = None
+_tracer: Any = None
+_provider: Any = None
+
+# Trazas abiertas (raíz local sin terminar) que se guardan como máximo por worker.
+MAX_OPEN_TRACES = 10_000
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **attributes: Any) -> ContextManager:
+    """Span hijo del actual; sin trazas activas no hace nada."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def root_span(name: str, **attributes: Any) -> ContextManager:
+    """
+    Span que inicia una traza nueva. Se usa para cada acción de un WebSocket:
+    una conexión puede durar horas y una traza por conexión no se decidiría
+    (ni exportaría) hasta el cierre.
+    """
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(
+        name, context=_context.Context(), kind=_trace.SpanKind.SERVER, attributes=attributes
+    )
+
+
+def _tail_sampling_processor(downstream):
+    """
+    Construye el procesador de muestreo por cola sobre `downstream`.
+
+    Se define aquí para no importar el SDK de OpenTelemetry si las trazas
+    están desactivadas.
+    """
+    from opentelemetry.sdk.trace import SpanProcessor
+    from opentelemetry.trace import StatusCode
+
+    class TailSamplingSpanProcessor(SpanProcessor):
+        """
+        Retiene los spans de cada traza hasta que termina su raíz local y
+        entonces decide: se exporta si algún span acabó en error, si la raíz
+        superó `TRACING_TAIL_LATENCY_MS` o, del resto, una fracción
+        `TRACING_TAIL_KEEP_RATIO`. El muestreo por cabeza ya ha descartado
+        antes la mayoría de trazas sin coste de grabación.
+        """
+
+        def __init__(self) -> None:
+            self._traces: "OrderedDict[int, List[Any]]" = OrderedDict()
+            self._lock = threading.Lock()
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._reset)
+
+        def _reset(self) -> None:
+            self._traces = OrderedDict()
+            self._lock = threading.Lock()
+
+        def on_end(self, span) -> None:
+            trace_id = span.context.trace_id
+            is_local_root = span.parent is None or span.parent.is_remote
+            with self._lock:
+                spans = self._traces.get(trace_id)
+                if spans is None:
+                    spans = self._traces[trace_id] = []
+                    if len(self._traces) > MAX_OPEN_TRACES:
+                        self._traces.popitem(last=False)
+                # La raíz se guarda siempre: sin ella la traza exportada queda huérfana.
+                if len(spans) < settings.TRACING_MAX_SPANS_PER_TRACE or is_local_root:
+                    spans.append(span)
+                if not is_local_root:
+                    return
+                del self._traces[trace_id]
+            if self._keep(span, spans):
+                for finished in spans:
+                    downstream.on_end(finished)
+
+        @staticmethod
+        def _keep(root, spans: List[Any]) -> bool:
+            if (root.end_time - root.start_time) / 1e6 >= settings.TRACING_TAIL_LATENCY_MS:
+                return True
+            if any(s.status.status_code is StatusCode.ERROR for s in spans):
+                return True
+            return random.random() < settings.TRACING_TAIL_KEEP_RATIO
+
+        def shutdown(self) -> None:
+            downstream.shutdown()
+
+        def force_flush(self, timeout_millis: int = 30000) -> bool:
+            return downstream.force_flush(timeout_millis)
+
+    return TailSamplingSpanProcessor()
+
+
+def _build_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if settings.TRACING_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter  # dependencia opcional
+        except ImportError:
+            logger.warning(
+                "TRACING_EXPORTER=otlp pero 'opentelemetry-exporter-otlp-proto-http' no está instalado; se usa %s.",
+                settings.TRACING_FILE_PATH,
+            )
+        else:
+            return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    # Un span JSON por línea. Con O_APPEND cada worker añade líneas completas al mismo fichero.
+    out = open(settings.TRACING_FILE_PATH, "a", buffering=1)
+    return ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+
+
+def setup_tracing() -> bool:
+    """
+    Activa las trazas si `TRACING_ENABLED`: proveedor con muestreo por cabeza
+    (`TRACING_HEAD_SAMPLE_RATIO`, respetando la decisión de un `traceparent`
+    entrante), muestreo por cola, exportación en segundo plano por lotes y
+    un span por sentencia SQL. Devuelve si quedaron activas.
+    """
+    global _trace, _context, _propagate, _tracer, _provider
+    if not settings.TRACING_ENABLED or _tracer is not None:
+        return _tracer is not None
+    try:
+        from opentelemetry import context, propagate, trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("TRACING_ENABLED pero 'opentelemetry-sdk' no está instalado; trazas desactivadas.")
+        return False
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_HEAD_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(_tail_sampling_processor(BatchSpanProcessor(_build_exporter())))
+    trace.set_tracer_provider(_provider)
+    _trace, _context, _propagate = trace, context, propagate
+    _tracer = trace.get_tracer("threadfit")
+    _instrument_engine()
+    logger.info(
+        "Trazas activas: cabeza %.0f %%, cola %.0f %% + lentas (>%.0f ms) y errores, exportador %s.",
+        settings.TRACING_HEAD_SAMPLE_RATIO * 100,
+        settings.TRACING_TAIL_KEEP_RATIO * 100,
+        settings.TRACING_TAIL_LATENCY_MS,
+        settings.TRACING_EXPORTER,
+    )
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Exporta los spans pendientes; se llama al cerrar la aplicación."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def _instrument_engine() -> None:
+    """
+    Un span CLIENT por sentencia. Los eventos de cursor se ejecutan en el
+    greenlet de SQLAlchemy, que hereda el contexto de la corrutina: el span
+    cuelga del span de la petición o del lote que lanzó la consulta.
+    """
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = _tracer.start_span(
+        operation,
+        kind=_trace.SpanKind.CLIENT,
+        attributes={
+            "db.system": "postgresql",
+            "db.operation": operation,
+            "db.statement": statement[: settings.TRACING_MAX_STATEMENT_CHARS],
+            "db.executemany": executemany,
+        },
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    trace_span = getattr(context, "_trace_span", None)
+    if trace_span is not None:
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            trace_span.set_attribute("db.rowcount", cursor.rowcount)
+        trace_span.end()
+
+
+def _handle_error(exception_context) -> None:
+    trace_span = getattr(exception_context.execution_context, "_trace_span", None)
+    if trace_span is not None:
+        trace_span.record_exception(exception_context.original_exception)
+        trace_span.set_status(_trace.Status(_trace.StatusCode.ERROR, type(exception_context.original_exception).__name__))
+        trace_span.end()
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre un span SERVER por petición HTTP, continuando la
+    traza de un `traceparent` entrante. Al terminar se renombra con la
+    plantilla de la ruta (`GET /posts/{post_id}`) para agrupar por endpoint.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            _tracer is None
+            or scope["type"] != "http"
+            # Las versiones recientes de FastAPI (o un servidor instrumentado) ya abren el span.
+            or _trace.get_current_span().get_span_context().is_valid
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        carrier: Dict[str, str] = {
+            name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]
+        }
+        with _tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=_propagate.extract(carrier),
+            kind=_trace.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as request_span:
+
+            async def send_with_status(message) -> None:
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.set_status(_trace.Status(_trace.StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.update_name(f"{method} {route}")
+                    request_span.set_attribute("http.route", route)
@@ -0,0 +1,99 @@
+import math
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import logger, settings
+from app.db import Post, PostScore, async_session
+from app.services.background_service import PeriodicTask
+from app.services.serialization_service import POST_COLUMNS, rows_to_dicts
+
+# Constante de decaimiento: la puntuación se reduce a la mitad cada media vida.
+DECAY_PER_SECOND = math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+# Clave del advisory lock que evita que varios workers reajusten la tabla a la vez.
+DECAY_LOCK_KEY = 0x7472656E64  # "trend"
+
+
+def _decayed(score, updated_at):
+    """Expresión SQL con la puntuación llevada al instante actual."""
+    age = func.extract("epoch", func.now() - updated_at)
+    return score * func.exp(-DECAY_PER_SECOND * age)
+
+
+async def record_interaction(db: AsyncSession, post_id: uuid.UUID, weight: float) -> None:
+    """
+    Suma `weight` a la puntuación del post (negativo al deshacer una interacción).
+    La puntuación existente se decae hasta ahora antes de sumar, de modo que el
+    coste es una única fila por interacción. No confirma la transacción: el
+    llamador lo hace junto con el like o el comentario.
+    """
+    stmt = insert(PostScore).values(post_id=post_id, score=max(weight, 0.0), updated_at=func.now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PostScore.post_id],
+        set_={
+            "score": func.greatest(_decayed(PostScore.score, PostScore.updated_at) + weight, 0.0),
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+class TrendingCache:
+    """Top-N de posts en tendencia, recalculado en segundo plano."""
+
+    def __init__(self) -> None:
+        self.posts: List[Dict[str, Any]] = []
+        self.refreshed_at: Optional[datetime] = None
+        self._last_decay = 0.0
+
+    async def _decay(self, db: AsyncSession) -> None:
+        """
+        Lleva todas las puntuaciones al instante actual y poda las residuales,
+        manteniendo la tabla acotada a los posts con actividad reciente.
+        """
+        locked = await db.scalar(select(func.pg_try_advisory_xact_lock(DECAY_LOCK_KEY)))
+        if not locked:
+            return
+        await db.execute(
+            update(PostScore).values(
+                score=_decayed(PostScore.score, PostScore.updated_at),
+                updated_at=func.now(),
+            )
+        )
+        result = await db.execute(delete(PostScore).where(PostScore.score < settings.TRENDING_MIN_SCORE))
+        logger.info("Puntuaciones de tendencia reajustadas; %s podadas.", result.rowcount)
+
+    async def refresh(self) -> None:
+        async with async_session() as db:
+            if time.monotonic() - self._last_decay >= settings.TRENDING_DECAY_SECONDS:
+                await self._decay(db)
+                self._last_decay = time.monotonic()
+
+            score = _decayed(PostScore.score, PostScore.updated_at).label("score")
+            stmt = (
+                select(*POST_COLUMNS, score)
+                .join(Post, Post.id == PostScore.post_id)
+                .where(Post.deleted_at.is_(None))
+                .order_by(score.desc(), Post.id)
+                .limit(settings.TRENDING_TOP_N)
+            )
+            rows = (await db.execute(stmt)).all()
+            await db.commit()
+
+        # Sustitución atómica: los lectores ven la lista anterior o la nueva.
+        self.posts = rows_to_dicts(rows)
+        self.refreshed_at = datetime.now(timezone.utc)
+
+    def top(self, limit: int) -> Dict[str, Any]:
+        return {"posts": self.posts[:limit], "refreshed_at": self.refreshed_at}
+
+
+trending_cache = TrendingCache()
+trending_refresher = PeriodicTask(
+    "trending-refresh", settings.TRENDING_REFRESH_SECONDS, trending_cache.refresh
+)
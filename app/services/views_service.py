@@ -0,0 +1,104 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.config import logger, settings
+from app.db import async_session
+from app.services.background_service import PeriodicTask
+from app.services.metrics_service import metrics
+
+# Un único UPDATE por flush: los incrementos llegan como dos arrays paralelos.
+FLUSH_SQL = text(
+    "UPDATE posts SET views = posts.views + v.n "
+    "FROM unnest(CAST(:ids AS uuid[]), CAST(:ns AS bigint[])) AS v(id, n) "
+    "WHERE posts.id = v.id"
+)
+
+views_dropped = metrics.counter(
+    "threadfit_views_dropped_total",
+    "Visitas descartadas por tener demasiados posts pendientes de volcar (base de datos caída).",
+)
+
+
+class ViewCounter:
+    """
+    Contador de visitas en memoria, por worker, con escritura diferida.
+
+    Las visitas se acumulan por post y se vuelcan a Postgres en lote cada
+    `VIEW_FLUSH_SECONDS` (o antes si hay demasiados posts pendientes). Si el
+    proceso cae, se pierden como mucho las visitas de un intervalo. Si falla
+    un volcado, no se adelanta otro hasta pasado un intervalo y, por encima
+    de `VIEW_MAX_PENDING` posts pendientes, las visitas a posts nuevos se
+    descartan en lugar de acumularse sin límite.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Counter = Counter()
+        self._lock = asyncio.Lock()
+        self._early_flush: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+
+    def record(self, post_ids: List[uuid.UUID]) -> None:
+        if len(self._pending) >= settings.VIEW_MAX_PENDING:
+            known = [post_id for post_id in post_ids if post_id in self._pending]
+            if len(known) < len(post_ids):
+                views_dropped.inc(len(post_ids) - len(known))
+            post_ids = known
+        self._pending.update(post_ids)
+        if (
+            len(self._pending) >= settings.VIEW_FLUSH_MAX_PENDING
+            and (self._early_flush is None or self._early_flush.done())
+            and time.monotonic() >= self._retry_at
+        ):
+            self._early_flush = asyncio.create_task(self.flush())
+            self._early_flush.add_done_callback(self._early_flush_done)
+
+    @staticmethod
+    def _early_flush_done(task: asyncio.Task) -> None:
+        # Nadie espera esta tarea: se recoge aquí su error para registrarlo.
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("No se pudieron volcar las visitas; se reintentará.", exc_info=task.exception())
+
+    def pending(self, post_id: uuid.UUID) -> int:
+        return self._pending.get(post_id, 0)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, Counter()
+            # Orden fijo de ids para que workers concurrentes bloqueen filas en el mismo orden.
+            ids = sorted(batch)
+            try:
+                async with async_session() as db:
+                    await db.execute(FLUSH_SQL, {"ids": ids, "ns": [batch[i] for i in ids]})
+                    await db.commit()
+            except Exception:
+                # Se devuelven al contador para reintentarlo en el siguiente flush.
+                self._pending.update(batch)
+                self._retry_at = time.monotonic() + settings.VIEW_FLUSH_SECONDS
+                raise
+            logger.debug("Visitas volcadas: %s posts, %s visitas", len(ids), sum(batch.values()))
+
+
+view_counter = ViewCounter()
+view_flusher = PeriodicTask("views-flush", settings.VIEW_FLUSH_SECONDS, view_counter.flush)
+
+
+def with_pending_views(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Suma a `views` las visitas aún no volcadas de este worker."""
+    for post in posts:
+        # Con `fields=` el post puede no incluir `views`.
+        if "views" in post:
+            post["views"] = (post["views"] or 0) + view_counter.pending(post["id"])
+    return posts
+
+
+def record_views(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cuenta una visita para cada post servido y devuelve los recuentos al día."""
+    view_counter.record([post["id"] for post in posts])
+    return with_pending_views(posts)
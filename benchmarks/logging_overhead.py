@@ -0,0 +1,128 @@
+"""
+Coste del logging por petición en el hilo del bucle de eventos.
+
+Compara tres configuraciones con una salida que simula stdout lento
+(`--sink-latency-us` por escritura):
+- `sync_text_3_info`: configuración anterior; `basicConfig` con StreamHandler
+  síncrono y las tres líneas INFO con f-string de `get_all_posts`.
+- `queue_json_3_info`: las mismas tres líneas a través de la cola no
+  bloqueante con salida JSON; formatear y escribir ocurre en otro hilo.
+- `queue_json_hot_path`: la ruta actual; una única línea DEBUG con
+  argumentos diferidos que, con nivel INFO, se descarta sin formatear.
+
+    python -m benchmarks.logging_overhead --output logging.json
+"""
+import argparse
+import io
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import timeit
+from typing import Callable, Dict
+
+from benchmarks import apply_settings_defaults
+
+apply_settings_defaults()
+
+from app.config.logging_config import TEXT_FORMAT, JSONFormatter, NonBlockingQueueHandler  # noqa: E402
+
+PAGE, PER_PAGE, TOTAL, ROWS = 3, 20, 125_000, 20
+
+
+class SlowSink(io.StringIO):
+    """Flujo de salida que tarda `latency` segundos en cada escritura (stdout a un pipe lleno)."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    def write(self, text: str) -> int:
+        if self.latency:
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+        self.seek(0)
+        self.truncate()
+        return len(text)
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def sync_text(sink: SlowSink) -> Callable[[], None]:
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    logger = _logger("sync", handler)
+
+    def request() -> None:
+        logger.info(f"Solicitud para listar publicaciones: page={PAGE}, per_page={PER_PAGE}")
+        logger.info(f"Total de publicaciones: {TOTAL}")
+        logger.info(f"Publicaciones obtenidas: {ROWS}")
+
+    return request
+
+
+def queued_json(sink: SlowSink, hot_path: bool) -> Callable[[], None]:
+    output = logging.StreamHandler(sink)
+    output.setFormatter(JSONFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue(100_000))
+    listener = logging.handlers.QueueListener(handler.queue, output)
+    listener.start()
+    logger = _logger("hot" if hot_path else "queue", handler)
+
+    if hot_path:
+        def request() -> None:
+            logger.debug("Publicaciones listadas: page=%s per_page=%s filas=%s total=%s", PAGE, PER_PAGE, ROWS, TOTAL)
+    else:
+        def request() -> None:
+            logger.info("Solicitud para listar publicaciones: page=%s, per_page=%s", PAGE, PER_PAGE)
+            logger.info("Total de publicaciones: %s", TOTAL)
+            logger.info("Publicaciones obtenidas: %s", ROWS)
+
+    request.listener = listener  # type: ignore[attr-defined]
+    return request
+
+
+def measure(request: Callable[[], None], number: int) -> Dict[str, float]:
+    best = min(timeit.Timer(request).repeat(repeat=5, number=number)) / number
+    listener = getattr(request, "listener", None)
+    if listener is not None:
+        listener.stop()
+    return {"us_per_request": round(best * 1e6, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coste del logging por petición.")
+    parser.add_argument("--number", type=int, default=2000, help="Peticiones simuladas por repetición.")
+    parser.add_argument("--sink-latency-us", type=float, default=20.0, help="Latencia de cada escritura en la salida.")
+    parser.add_argument("--output", default="-", help="Fichero JSON de resultados ('-' = stdout).")
+    args = parser.parse_args()
+
+    latency = args.sink_latency_us / 1e6
+    results = {
+        "sink_latency_us": args.sink_latency_us,
+        "sync_text_3_info": measure(sync_text(SlowSink(latency)), args.number),
+        "queue_json_3_info": measure(queued_json(SlowSink(latency), hot_path=False), args.number),
+        "queue_json_hot_path": measure(queued_json(SlowSink(latency), hot_path=True), args.number),
+    }
+    speedup = results["sync_text_3_info"]["us_per_request"] / results["queue_json_hot_path"]["us_per_request"]
+    print(f"Ruta caliente: {speedup:.0f}x menos tiempo de logging en el bucle por petición", file=sys.stderr)
+
+    payload = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(payload)
+    else:
+        with open(args.output, "w") as fh:
+            fh.write(payload)
+
+
+if __name__ == "__main__":
+    main()
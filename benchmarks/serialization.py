@@ -0,0 +1,128 @@
+"""
+Micro-benchmarks de serialización de las rutas calientes.
+
+Compara, para 10/100/10k filas:
+- `orm_pydantic`: ruta anterior del feed; objetos ORM validados en
+  `PaginatedPostsResponse` (from_attributes) y codificados como hace FastAPI.
+- `rows_orjson`: ruta actual; filas de columnas convertidas a dict y
+  serializadas con orjson, sin revalidación.
+- `export_posts` / `export_comments`: `to_dict_post`/`to_dict_comment` más JSON.
+
+    python -m benchmarks.serialization --output serialization.json
+"""
+import argparse
+import json
+import sys
+import timeit
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks import apply_settings_defaults
+
+apply_settings_defaults()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.db import Comment, Post  # noqa: E402
+from app.routes.schemas import PaginatedPostsResponse  # noqa: E402
+from app.services.data_collection_service import to_dict_comment, to_dict_post  # noqa: E402
+from app.services.serialization_service import (  # noqa: E402
+    POST_COLUMNS,
+    FastJSONResponse,
+    paginated_posts_payload,
+)
+
+SIZES = (10, 100, 10_000)
+CONTENT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+
+PostRow = namedtuple("PostRow", [column.key for column in POST_COLUMNS])
+
+
+def make_posts(count: int) -> List[Post]:
+    now = datetime.now(timezone.utc)
+    return [
+        Post(
+            id=uuid.uuid4(), title=f"Publicación {i}", content=CONTENT, is_published=True, views=0,
+            user_id=uuid.uuid4(), created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def make_comments(count: int) -> List[Comment]:
+    now = datetime.now(timezone.utc)
+    return [
+        Comment(id=uuid.uuid4(), content=CONTENT, post_id=uuid.uuid4(), user_id=uuid.uuid4(), created_at=now)
+        for _ in range(count)
+    ]
+
+
+def as_rows(posts: List[Post]) -> List[PostRow]:
+    return [PostRow(*(getattr(post, column.key) for column in POST_COLUMNS)) for post in posts]
+
+
+def orm_pydantic(posts: List[Post]) -> bytes:
+    response = PaginatedPostsResponse(
+        posts=posts, total=len(posts), pages=1, current_page=1,
+        per_page=len(posts), has_next=False, has_prev=False,
+    )
+    # FastAPI revalida contra el response_model y codifica a JSON.
+    validated = PaginatedPostsResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def rows_orjson(rows: List[PostRow]) -> bytes:
+    return FastJSONResponse(paginated_posts_payload(rows, len(rows), 1, len(rows))).body
+
+
+def export_posts(posts: List[Post]) -> bytes:
+    return FastJSONResponse({"data": [to_dict_post(p) for p in posts]}).body
+
+
+def export_comments(comments: List[Comment]) -> bytes:
+    return FastJSONResponse({"data": [to_dict_comment(c) for c in comments]}).body
+
+
+def measure(fn: Callable[[Any], bytes], data: Any, size: int, min_time: float) -> Dict[str, float]:
+    timer = timeit.Timer(lambda: fn(data))
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=5, number=number)) / number
+    return {
+        "ms_per_call": round(best * 1000, 4),
+        "us_per_row": round(best / size * 1e6, 3),
+        "bytes": len(fn(data)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de serialización.")
+    parser.add_argument("--output", default="-", help="Fichero JSON de resultados ('-' = stdout).")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Tiempo mínimo por medida (s).")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in SIZES:
+        posts, comments = make_posts(size), make_comments(size)
+        rows = as_rows(posts)
+        results[str(size)] = {
+            "orm_pydantic": measure(orm_pydantic, posts, size, args.min_time),
+            "rows_orjson": measure(rows_orjson, rows, size, args.min_time),
+            "export_posts": measure(export_posts, posts, size, args.min_time),
+            "export_comments": measure(export_comments, comments, size, args.min_time),
+        }
+        speedup = results[str(size)]["orm_pydantic"]["ms_per_call"] / results[str(size)]["rows_orjson"]["ms_per_call"]
+        print(f"{size:>6} filas: rows_orjson es {speedup:.1f}x más rápido que orm_pydantic", file=sys.stderr)
+
+    payload = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(payload)
+    else:
+        with open(args.output, "w") as fh:
+            fh.write(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Coste de arranque de un worker.
+
+Lanza `--runs` intérpretes nuevos que importan `main` (como hace cada worker
+sin precarga) y mide:
+- `import_ms`: tiempo de pared del `import main`.
+- `rss_mb`: memoria residente del proceso tras el import.
+- `top_modules`: módulos con más tiempo acumulado según `-X importtime`.
+- `deferred`: dependencias pesadas que no deberían cargarse al arrancar
+  (ReportLab, Faker, ...) y si aparecen en `sys.modules`.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from benchmarks import apply_settings_defaults
+
+DEFERRED_MODULES = ("reportlab", "faker", "jose", "redis")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main  # noqa: F401
+elapsed = time.perf_counter() - start
+rss_kb = 0
+with open("/proc/self/status") as fh:
+    for line in fh:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "rss_kb": rss_kb,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def _run_probe(env: Dict[str, str], importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    return subprocess.run(cmd + ["-c", PROBE], env=env, capture_output=True, text=True, check=True)
+
+
+def top_modules(stderr: str, limit: int) -> List[Dict[str, Any]]:
+    """Módulos con más tiempo acumulado (incluidos sus imports) en `-X importtime`."""
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        totals[name] = max(totals.get(name, 0), int(cumulative))
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tiempo de import y memoria por worker.")
+    parser.add_argument("--runs", type=int, default=5, help="Intérpretes a lanzar.")
+    parser.add_argument("--top", type=int, default=15, help="Módulos a listar de -X importtime.")
+    parser.add_argument("--output", default="-", help="Fichero JSON de resultados ('-' = stdout).")
+    args = parser.parse_args()
+
+    env = apply_settings_defaults(dict(os.environ))
+    # La primera ejecución calienta la caché de bytecode y la del sistema de ficheros.
+    _run_probe(env)
+    # Las medidas solo leen los .pyc ya escritos; si alguno faltara, no se reescribe en cada run.
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    samples = [json.loads(_run_probe(env).stdout.splitlines()[-1]) for _ in range(args.runs)]
+    import_ms = [s["import_ms"] for s in samples]
+    rss_mb = [s["rss_kb"] / 1024 for s in samples]
+    traced = _run_probe(env, importtime=True)
+
+    results = {
+        "runs": args.runs,
+        "import_ms": {
+            "median": round(statistics.median(import_ms), 1),
+            "min": round(min(import_ms), 1),
+            "max": round(max(import_ms), 1),
+        },
+        "rss_mb": {"median": round(statistics.median(rss_mb), 1), "max": round(max(rss_mb), 1)},
+        "deferred": {name: name in samples[-1]["loaded"] for name in DEFERRED_MODULES},
+        "top_modules": top_modules(traced.stderr, args.top),
+    }
+    print(
+        f"import main: {results['import_ms']['median']} ms, RSS {results['rss_mb']['median']} MB por worker",
+        file=sys.stderr,
+    )
+
+    payload = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(payload)
+    else:
+        with open(args.output, "w") as fh:
+            fh.write(payload)
+
+
+if __name__ == "__main__":
+    main()
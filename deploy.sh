@@ -22,6 +22,8 @@ echo "Para demostrar el funcionamiento del HPA, puedes generar carga con:"
 echo "kubectl run -i --tty load-generator --rm --image=busybox -- /bin/sh"
 echo "y dentro del pod ejecutar:"
 echo "while true; do wget -q -O- http://threadfit-service:8000/; done"
+echo "o, para una carga realista con métricas de latencia por ruta:"
+echo "python -m benchmarks.http_load --base-url https://threadfit.local --concurrency 64"
 echo ""
 echo "Luego observa el HPA con:"
 echo "kubectl get hpa -n $NAMESPACE"
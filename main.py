@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from sqlalchemy.exc import DBAPIError
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,23 +10,55 @@ from app.routes.posts_routes import posts_router
 from app.routes.interactions_routes import interactions_router
 from app.routes.generation_routes import synthetic_router
 from app.routes.data_collection_routes import data_router
+from app.routes.debug_routes import debug_router
+from app.routes.health_routes import health_router
+from app.routes.metrics_routes import metrics_router
 from app.real_time.websockets_routes import websocket_router
 
 # Configuración y logging
 from app.config import logger, settings
+from app.services.admission_service import AdmissionControlMiddleware
+from app.services.idempotency_service import IdempotentReplay, idempotent_replay_handler
+from app.services.ratelimit_service import RateLimitMiddleware
+from app.services.timeouts_service import StatementBudgetMiddleware, statement_timeout_handler
+from app.services.tracing_service import TracingMiddleware, setup_tracing
+from app.services.lifecycle_service import lifespan
+
+# Trazas OpenTelemetry (solo con TRACING_ENABLED)
+setup_tracing()
 
 # Inicialización de la aplicación FastAPI
 app = FastAPI(
     title="ThreadFit",
     description="Servicios para gestionar publicaciones, interacciones, autenticación y perfiles.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Reintentos con Idempotency-Key ya completados: se devuelve la respuesta guardada.
+app.add_exception_handler(IdempotentReplay, idempotent_replay_handler)
+# Consultas canceladas por statement_timeout: 504 en lugar de 500.
+app.add_exception_handler(DBAPIError, statement_timeout_handler)
+
 # Redirección raíz a la documentación interactiva
 @app.get("/", include_in_schema=False)
 async def root():
     return RedirectResponse(url="/docs")
 
+# statement_timeout por clase de ruta y cancelación de GET abandonados por el cliente.
+app.add_middleware(StatementBudgetMiddleware)
+
+# Control de admisión: rechaza con 503 antes de que se acumulen esperas al pool.
+# Se añade antes que CORS para que los 503 también lleven las cabeceras CORS.
+app.add_middleware(AdmissionControlMiddleware)
+
+# Límite de peticiones por usuario o IP: los clientes que abusan no llegan a
+# ocupar plazas del control de admisión.
+app.add_middleware(RateLimitMiddleware)
+
+# Span por petición: envuelve también los 429/503 de los middlewares interiores.
+app.add_middleware(TracingMiddleware)
+
 # Configuración del middleware CORS
 # En producción, settings.ALLOWED_ORIGINS debe ser una lista de dominios permitidos
 app.add_middleware(
@@ -34,12 +67,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy", "Retry-After",
+        "X-Next-Cursor",
+    ],
 )
 
 def register_routers(app: FastAPI):
     """
     Registra todos los routers de la aplicación.
     """
+    app.include_router(health_router)
+    app.include_router(metrics_router)
     app.include_router(auth_router)
     app.include_router(profile_router)
     app.include_router(posts_router)
@@ -47,16 +86,8 @@ def register_routers(app: FastAPI):
     app.include_router(synthetic_router)
     app.include_router(data_router)
     app.include_router(websocket_router)
+    app.include_router(debug_router)
 
 # Registro de routers
 register_routers(app)
 logger.info("Todos los routers han sido registrados.")
-
-# Eventos de ciclo de vida de la aplicación
-@app.on_event("startup")
-async def startup_event():
-    logger.info("La aplicación ThreadFit ha iniciado.")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("La aplicación ThreadFit se está cerrando.")
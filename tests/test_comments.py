@@ -78,3 +78,64 @@ async def test_create_and_list_comments():
         assert isinstance(comments, list)
         assert any(c["id"] == comment_data["id"] for c in comments)
         logger.info(f"Comentarios listados con éxito. Total: {len(comments)}")
+
+@pytest.mark.asyncio
+async def test_threaded_replies():
+    email = f"threader_{uuid.uuid4().hex}@example.com"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        post_resp = await client.post("/posts/create_post", json={"title": "Hilo", "content": "Cuerpo"})
+        assert post_resp.status_code == 201, post_resp.text
+        post_id = post_resp.json()["data"]["id"]
+
+        async def reply(content, parent_id=None):
+            resp = await client.post(
+                f"/interactions/{post_id}/comments",
+                json={"content": content, "parent_id": parent_id},
+            )
+            assert resp.status_code == 201, resp.text
+            return resp.json()["data"]["id"]
+
+        root_a = await reply("A")
+        child = await reply("A.1", root_a)
+        grandchild = await reply("A.1.a", child)
+        root_b = await reply("B")
+
+        # Orden de lectura: cada raíz seguida de su subárbol.
+        thread = (await client.get(f"/interactions/{post_id}/comments")).json()
+        assert [c["id"] for c in thread] == [root_a, child, grandchild, root_b]
+        assert [c["depth"] for c in thread] == [0, 1, 2, 0]
+        assert thread[0]["reply_count"] == 1
+
+        # Paginación por nivel y límite de profundidad.
+        first = await client.get(f"/interactions/{post_id}/comments", params={"limit": 1, "max_depth": 1})
+        assert [c["id"] for c in first.json()] == [root_a, child]
+        cursor = first.headers["X-Next-Cursor"]
+        second = await client.get(f"/interactions/{post_id}/comments", params={"limit": 1, "cursor": cursor})
+        assert [c["id"] for c in second.json()] == [root_b]
+
+        replies = await client.get(f"/interactions/{post_id}/comments", params={"parent_id": child})
+        assert [c["id"] for c in replies.json()] == [grandchild]
+
+        # Respuestas por comentario acotadas: el resto se pagina con parent_id.
+        second_child = await reply("A.2", root_a)
+        capped = await client.get(
+            f"/interactions/{post_id}/comments", params={"limit": 1, "replies_limit": 1}
+        )
+        assert [c["id"] for c in capped.json()] == [root_a, child, grandchild]
+        assert capped.json()[0]["reply_count"] == 2
+        page = await client.get(
+            f"/interactions/{post_id}/comments", params={"parent_id": root_a, "max_depth": 0, "limit": 1}
+        )
+        assert [c["id"] for c in page.json()] == [child]
+        rest = await client.get(
+            f"/interactions/{post_id}/comments",
+            params={"parent_id": root_a, "max_depth": 0, "limit": 1, "cursor": page.headers["X-Next-Cursor"]},
+        )
+        assert [c["id"] for c in rest.json()] == [second_child]
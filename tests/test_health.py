@@ -0,0 +1,57 @@
+# tests/test_health.py
+
+import uuid
+import pytest
+from httpx import AsyncClient
+from app.config import settings
+
+PASSWORD = "securepassword123"
+
+def get_base_url():
+    """
+    Devuelve el primer origen permitido como base_url para httpx.
+    """
+    origins = settings.ALLOWED_ORIGINS
+    if isinstance(origins, list):
+        return origins[0]
+    return origins
+
+@pytest.mark.asyncio
+async def test_liveness_and_readiness():
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        live = await client.get("/health/live")
+        assert live.status_code == 200, live.text
+        assert live.json() == {"status": "ok"}
+
+        ready = await client.get("/health/ready")
+        assert ready.status_code == 200, ready.text
+        body = ready.json()
+        assert body["status"] == "ready"
+        assert body["reasons"] == []
+        assert set(body["inflight"]) == {"read", "write", "export", "generation"}
+        assert body["pool_pressure"] < 1.0
+
+@pytest.mark.asyncio
+async def test_metrics_exposition():
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        resp = await client.get("/metrics")
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "# TYPE threadfit_statement_timeouts_total counter" in resp.text
+        assert 'threadfit_requests_inflight{route_class="read"}' in resp.text
+
+@pytest.mark.asyncio
+async def test_loop_monitor_requires_superuser():
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        anonymous = await client.get("/debug/loop")
+        assert anonymous.status_code == 401, anonymous.text
+
+        email = f"debug_{uuid.uuid4().hex}@example.com"
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, reg.text
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, login.text
+        client.cookies.update(login.cookies)
+
+        regular = await client.get("/debug/loop")
+        assert regular.status_code == 403, regular.text
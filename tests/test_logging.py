@@ -0,0 +1,60 @@
+# tests/test_logging.py
+
+import logging
+import queue
+import random
+
+from app.config import logging_config
+from app.config.logging_config import NonBlockingQueueHandler, RateLimitFilter, SamplingFilter
+
+
+def make_record(name="ThreadFit.ws", level=logging.INFO, msg="mensaje"):
+    return logging.LogRecord(name, level, __file__, 0, msg, None, None)
+
+
+def test_sampling_filter_applies_rate_by_logger_prefix():
+    sampler = SamplingFilter({"ThreadFit.ws": 0.0, "ThreadFit.posts": 0.5})
+
+    # Los hijos heredan la tasa del logger configurado; WARNING o más siempre pasa.
+    assert not sampler.filter(make_record("ThreadFit.ws.generate"))
+    assert sampler.filter(make_record("ThreadFit.ws", logging.WARNING))
+    assert sampler.filter(make_record("ThreadFit.auth"))
+
+    random.seed(1234)
+    kept = sum(sampler.filter(make_record("ThreadFit.posts")) for _ in range(2000))
+    assert 800 < kept < 1200
+
+
+def test_rate_limit_filter_reports_suppressed(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: clock[0])
+    limiter = RateLimitFilter(per_second=1.0, burst=2)
+
+    results = [limiter.filter(make_record()) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+    # ERROR no gasta tokens ni se descarta.
+    assert limiter.filter(make_record(level=logging.ERROR))
+    # Otro logger tiene su propio bucket.
+    assert limiter.filter(make_record("ThreadFit.posts"))
+
+    clock[0] += 1.0
+    record = make_record()
+    assert limiter.filter(record)
+    assert record.suppressed == 3
+    clock[0] += 1.0
+    record = make_record()
+    assert limiter.filter(record)
+    assert not hasattr(record, "suppressed")
+
+
+def test_queue_handler_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    before = NonBlockingQueueHandler.dropped
+
+    first, second = make_record(msg="primero"), make_record(msg="segundo")
+    handler.handle(first)
+    handler.handle(second)  # No bloquea: la cola ya está llena.
+
+    assert NonBlockingQueueHandler.dropped == before + 1
+    # El registro se encola sin formatear.
+    assert handler.queue.get_nowait() is first
@@ -0,0 +1,33 @@
+# tests/test_loop_monitor.py
+
+import asyncio
+import time
+
+from app.config import settings
+from app.services.loop_monitor_service import LoopMonitor, stalls
+
+
+def blocking_handler(seconds: float) -> None:
+    # El vigilante busca en la pila el `scope` ASGI de la petición en curso.
+    scope = {"type": "http", "method": "GET", "path": "/posts/all_posts"}
+    time.sleep(seconds)
+
+
+async def test_stall_captured_with_stack_and_route():
+    monitor = LoopMonitor()
+    before = stalls.value(route_class="read")
+    monitor.start()
+    try:
+        await asyncio.sleep(settings.LOOP_MONITOR_INTERVAL_SECONDS * 2)
+        blocking_handler(settings.LOOP_MONITOR_INTERVAL_SECONDS + settings.LOOP_SLOW_CALLBACK_SECONDS * 4)
+        # El latido siguiente detecta el retraso y registra el evento.
+        await asyncio.sleep(settings.LOOP_MONITOR_INTERVAL_SECONDS * 3)
+    finally:
+        await monitor.stop()
+
+    (event,) = [e for e in monitor.events if e["stack"]]
+    assert event["lag_ms"] >= settings.LOOP_SLOW_CALLBACK_SECONDS * 1000
+    assert any("blocking_handler" in line for line in event["stack"])
+    assert event["request"]["path"] == "/posts/all_posts"
+    assert event["request"]["route_class"] == "read"
+    assert stalls.value(route_class="read") == before + 1
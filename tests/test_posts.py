@@ -1,5 +1,7 @@
 # tests/test_posts.py
 
+import asyncio
+import time
 import uuid
 import pytest
 from httpx import AsyncClient
@@ -78,3 +80,211 @@ async def test_list_posts():
         assert isinstance(page, dict)
         assert "posts" in page and isinstance(page["posts"], list)
         assert page["current_page"] == 1
+        assert all(isinstance(post["views"], int) for post in page["posts"])
+
+@pytest.mark.asyncio
+async def test_search_posts():
+    email = f"searcher_{uuid.uuid4().hex}@example.com"
+    keyword = f"kw{uuid.uuid4().hex[:12]}"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post(
+            "/auth/register",
+            json={"email": email, "password": PASSWORD},
+        )
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+
+        login = await client.post(
+            "/auth/login",
+            data={"username": email, "password": PASSWORD},
+        )
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        created = await client.post(
+            "/posts/create_post",
+            json={"title": f"Título {keyword}", "content": "Contenido de búsqueda"},
+        )
+        assert created.status_code == 201, created.text
+        post_id = created.json()["data"]["id"]
+
+        resp = await client.get("/posts/search", params={"q": keyword})
+        assert resp.status_code == 200, resp.text
+        results = resp.json()["results"]
+        assert [r["id"] for r in results] == [post_id]
+        assert "<mark>" in results[0]["snippet"] or keyword in results[0]["title"]
+
+@pytest.mark.asyncio
+async def test_trending_posts():
+    email = f"trender_{uuid.uuid4().hex}@example.com"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        post_ids = []
+        for title in ("Con actividad", "Sin actividad"):
+            created = await client.post("/posts/create_post", json={"title": title, "content": "Tendencias"})
+            assert created.status_code == 201, created.text
+            post_ids.append(created.json()["data"]["id"])
+        active, untouched = post_ids
+        assert (await client.post(f"/interactions/{active}/like")).status_code == 200
+        comment = await client.post(f"/interactions/{active}/comments", json={"content": "En tendencia"})
+        assert comment.status_code == 201, comment.text
+
+        # El top-N se recalcula en segundo plano cada TRENDING_REFRESH_SECONDS.
+        deadline = time.monotonic() + 2 * settings.TRENDING_REFRESH_SECONDS + 5
+        while True:
+            resp = await client.get("/posts/trending", params={"limit": 100})
+            assert resp.status_code == 200, resp.text
+            posts = resp.json()["posts"]
+            scores = {post["id"]: post["score"] for post in posts}
+            if active in scores:
+                break
+            if time.monotonic() > deadline:
+                pytest.fail("El post con like y comentario no llegó a tendencias.")
+            await asyncio.sleep(0.5)
+
+        expected = settings.TRENDING_LIKE_WEIGHT + settings.TRENDING_COMMENT_WEIGHT
+        assert 0 < scores[active] <= expected
+        # Sin interacciones no tiene puntuación: no aparece (o queda por debajo).
+        assert scores.get(untouched, 0) < scores[active]
+        ordered = [post["score"] for post in posts]
+        assert ordered == sorted(ordered, reverse=True)
+
+@pytest.mark.asyncio
+async def test_delete_liked_post_hard_and_soft():
+    email = f"deleter_{uuid.uuid4().hex}@example.com"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        for soft in (False, True):
+            created = await client.post(
+                "/posts/create_post",
+                json={"title": "Para borrar", "content": "Con like y comentario"},
+            )
+            assert created.status_code == 201, created.text
+            post_id = created.json()["data"]["id"]
+            assert (await client.post(f"/interactions/{post_id}/like")).status_code == 200
+            comment = await client.post(f"/interactions/{post_id}/comments", json={"content": "Hola"})
+            assert comment.status_code == 201, comment.text
+
+            resp = await client.delete(f"/posts/{post_id}", params={"soft": soft})
+            assert resp.status_code == 200, resp.text
+            # Borrado (u oculto): ya no admite interacciones ni un segundo borrado.
+            assert (await client.post(f"/interactions/{post_id}/like")).status_code == 404
+            assert (await client.delete(f"/posts/{post_id}")).status_code == 404
+            # Sus comentarios tampoco se listan, aunque la purga siga pendiente.
+            assert (await client.get(f"/interactions/{post_id}/comments")).json() == []
+
+@pytest.mark.asyncio
+async def test_bulk_create_posts():
+    email = f"importer_{uuid.uuid4().hex}@example.com"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        resp = await client.post("/posts/bulk", json={"posts": [
+            {"title": "Uno", "content": "Primero"},
+            {"title": "Sin contenido"},
+            {"title": "Dos", "content": "Segundo", "is_published": True},
+        ]})
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert (body["created"], body["failed"]) == (2, 1)
+        assert [r["status"] for r in body["results"]] == ["created", "invalid", "created"]
+
+        # Un string con JSON dentro del array no es un objeto: se rechaza.
+        resp = await client.post("/posts/bulk", json=['{"title": "Doble", "content": "x"}', 7])
+        assert resp.status_code == 200, resp.text
+        assert [r["status"] for r in resp.json()["results"]] == ["invalid", "invalid"]
+
+        ndjson = b'{"title": "L1", "content": "a"}\n\n{"title": "L3", "content": "b"}\n'
+        resp = await client.post(
+            "/posts/bulk", content=ndjson, headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert resp.status_code == 200, resp.text
+        assert [r["index"] for r in resp.json()["results"]] == [0, 2]
+
+@pytest.mark.asyncio
+async def test_create_post_idempotency_key():
+    email = f"retrier_{uuid.uuid4().hex}@example.com"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        body = {"title": "Reintento", "content": "Solo una vez"}
+        first = await client.post("/posts/create_post", json=body, headers=headers)
+        retry = await client.post("/posts/create_post", json=body, headers=headers)
+        assert first.status_code == retry.status_code == 201, retry.text
+        assert retry.json()["data"]["id"] == first.json()["data"]["id"]
+        assert retry.headers.get("Idempotent-Replayed") == "true"
+
+        other = await client.post(
+            "/posts/create_post", json={**body, "title": "Otro"}, headers=headers,
+        )
+        assert other.status_code == 422, other.text
+
+@pytest.mark.asyncio
+async def test_get_post_batch_and_update():
+    email = f"reader_{uuid.uuid4().hex}@example.com"
+
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+        assert reg.status_code == 201, f"Registro falló: {reg.text}"
+        login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        assert login.status_code == 204, f"Login falló: {login.text}"
+        client.cookies.update(login.cookies)
+
+        created = await client.post("/posts/create_post", json={"title": "Detalle", "content": "Texto"})
+        assert created.status_code == 201, created.text
+        post_id = created.json()["data"]["id"]
+
+        resp = await client.get(f"/posts/{post_id}")
+        assert resp.status_code == 200, resp.text
+        assert (resp.json()["comment_count"], resp.json()["like_count"]) == (0, 0)
+
+        # Las escrituras invalidan la caché del post.
+        assert (await client.post(f"/interactions/{post_id}/like")).status_code == 200
+        patched = await client.patch(f"/posts/{post_id}", json={"title": "Detalle editado"})
+        assert patched.status_code == 200, patched.text
+        resp = await client.get(f"/posts/{post_id}")
+        assert resp.json()["like_count"] == 1
+        assert resp.json()["title"] == "Detalle editado"
+
+        unknown = str(uuid.uuid4())
+        batch = await client.get("/posts/batch", params={"ids": f"{unknown},{post_id}"})
+        assert batch.status_code == 200, batch.text
+        assert [p["id"] for p in batch.json()["posts"]] == [post_id]
+        assert batch.json()["missing"] == [unknown]
+
+@pytest.mark.asyncio
+async def test_list_posts_sparse_fields_and_excerpt():
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        resp = await client.get(
+            "/posts/all_posts", params={"per_page": 5, "fields": "title,content", "excerpt_len": 10},
+        )
+        assert resp.status_code == 200, resp.text
+        for post in resp.json()["posts"]:
+            assert set(post) == {"id", "title", "content"}
+            assert len(post["content"]) <= 10
+
+        bad = await client.get("/posts/all_posts", params={"fields": "password"})
+        assert bad.status_code == 400, bad.text
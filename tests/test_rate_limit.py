@@ -0,0 +1,28 @@
+# tests/test_rate_limit.py
+
+import pytest
+from httpx import AsyncClient
+from app.config import settings
+
+def get_base_url():
+    """
+    Devuelve el primer origen permitido como base_url para httpx.
+    """
+    origins = settings.ALLOWED_ORIGINS
+    if isinstance(origins, list):
+        return origins[0]
+    return origins
+
+@pytest.mark.asyncio
+async def test_rate_limit_headers_on_anonymous_reads():
+    async with AsyncClient(base_url=get_base_url(), verify=False) as client:
+        first = await client.get("/posts/trending")
+        assert first.status_code == 200, first.text
+        assert first.headers["RateLimit-Limit"] == str(settings.RATE_LIMIT_IP_BURST)
+        assert "RateLimit-Policy" in first.headers
+        second = await client.get("/posts/trending")
+        assert int(second.headers["RateLimit-Remaining"]) <= int(first.headers["RateLimit-Remaining"])
+
+        # Las sondas no consumen tokens.
+        health = await client.get("/health/live")
+        assert "RateLimit-Limit" not in health.headers
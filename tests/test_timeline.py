@@ -0,0 +1,63 @@
+# tests/test_timeline.py
+
+import asyncio
+import uuid
+import pytest
+from httpx import AsyncClient
+from app.config import settings, logger
+
+PASSWORD = "securepassword123"
+
+def get_base_url():
+    """
+    Devuelve el primer origen permitido como base_url para httpx.
+    """
+    origins = settings.ALLOWED_ORIGINS
+    if isinstance(origins, list):
+        return origins[0]
+    return origins
+
+async def register_and_login(client: AsyncClient, prefix: str):
+    email = f"{prefix}_{uuid.uuid4().hex}@example.com"
+    reg = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+    assert reg.status_code == 201, f"Registro falló: {reg.text}"
+    login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+    assert login.status_code == 204, f"Login falló: {login.text}"
+    return reg.json()["id"], login.cookies
+
+@pytest.mark.asyncio
+async def test_follow_and_home_timeline():
+    async with AsyncClient(base_url=get_base_url(), verify=False) as author, \
+            AsyncClient(base_url=get_base_url(), verify=False) as reader:
+        author_id, author_cookies = await register_and_login(author, "author")
+        author.cookies.update(author_cookies)
+        _, reader_cookies = await register_and_login(reader, "reader")
+        reader.cookies.update(reader_cookies)
+
+        logger.info(f"Siguiendo al autor {author_id}")
+        follow = await reader.post(f"/user/{author_id}/follow")
+        assert follow.status_code == 201, follow.text
+        again = await reader.post(f"/user/{author_id}/follow")
+        assert again.status_code == 400, again.text
+
+        created = await author.post(
+            "/posts/create_post",
+            json={"title": "Para mis seguidores", "content": "Contenido del timeline"},
+        )
+        assert created.status_code == 201, created.text
+        post_id = created.json()["data"]["id"]
+
+        # El reparto se hace en segundo plano tras la respuesta.
+        for _ in range(20):
+            timeline = await reader.get("/user/timeline")
+            assert timeline.status_code == 200, timeline.text
+            if any(p["id"] == post_id for p in timeline.json()["posts"]):
+                break
+            await asyncio.sleep(0.25)
+        else:
+            pytest.fail("El post no llegó al timeline del seguidor.")
+
+        unfollow = await reader.delete(f"/user/{author_id}/follow")
+        assert unfollow.status_code == 200, unfollow.text
+        timeline = await reader.get("/user/timeline")
+        assert all(p["id"] != post_id for p in timeline.json()["posts"])
@@ -0,0 +1,82 @@
+# tests/test_timeouts.py
+
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+from starlette.requests import Request
+
+from app.db import statement_timeout_ms
+from app.services.timeouts_service import (
+    QUERY_CANCELED,
+    StatementBudgetMiddleware,
+    client_disconnects,
+    statement_budget_ms,
+    statement_timeout_handler,
+)
+
+
+class CanceledQuery(Exception):
+    sqlstate = QUERY_CANCELED
+
+
+def http_scope(method="GET", path="/posts/all_posts"):
+    return {"type": "http", "method": method, "path": path, "headers": [], "query_string": b""}
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout_maps_to_504():
+    request = Request(http_scope())
+    resp = await statement_timeout_handler(request, DBAPIError("SELECT 1", {}, CanceledQuery()))
+    assert resp.status_code == 504
+
+    # Cualquier otro error de la base de datos sigue su curso (500).
+    other = DBAPIError("SELECT 1", {}, Exception("connection reset"))
+    with pytest.raises(DBAPIError):
+        await statement_timeout_handler(request, other)
+
+
+@pytest.mark.asyncio
+async def test_get_cancelled_when_client_disconnects():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def receive():
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise AssertionError("No debe enviarse respuesta a un cliente desconectado.")
+
+    before = client_disconnects.value(route_class="read")
+    await asyncio.wait_for(StatementBudgetMiddleware(slow_app)(http_scope(), receive, send), 5)
+    assert cancelled.is_set()
+    assert client_disconnects.value(route_class="read") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_background_work_runs_without_budget():
+    budgets = {}
+
+    async def app_with_background(scope, receive, send):
+        budgets["request"] = statement_timeout_ms.get()
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+        # Aquí ejecuta Starlette las BackgroundTasks.
+        budgets["background"] = statement_timeout_ms.get()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await StatementBudgetMiddleware(app_with_background)(http_scope("POST", "/posts/create_post"), receive, send)
+    assert budgets == {"request": statement_budget_ms("write"), "background": 0}
@@ -0,0 +1,106 @@
+# tests/test_tracing.py
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")  # dependencia opcional
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.config import settings
+from app.services import tracing_service
+from app.services.tracing_service import TracingMiddleware, _tail_sampling_processor
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(_tail_sampling_processor(SimpleSpanProcessor(exporter)))
+    monkeypatch.setattr(settings, "TRACING_TAIL_LATENCY_MS", 500.0)
+    monkeypatch.setattr(settings, "TRACING_TAIL_KEEP_RATIO", 0.0)
+    monkeypatch.setattr(tracing_service, "_tracer", provider.get_tracer("test"))
+    monkeypatch.setattr(tracing_service, "_trace", trace)
+    monkeypatch.setattr(tracing_service, "_context", context)
+    monkeypatch.setattr(tracing_service, "_propagate", propagate)
+    return exporter
+
+
+def exported_names(exporter):
+    return sorted(s.name for s in exporter.get_finished_spans())
+
+
+def test_fast_traces_dropped_by_ratio(exporter, monkeypatch):
+    with tracing_service.root_span("rápida"):
+        with tracing_service.span("hijo"):
+            pass
+    assert exporter.get_finished_spans() == ()
+
+    monkeypatch.setattr(settings, "TRACING_TAIL_KEEP_RATIO", 1.0)
+    with tracing_service.root_span("rápida"):
+        with tracing_service.span("hijo"):
+            pass
+    assert exported_names(exporter) == ["hijo", "rápida"]
+
+
+def test_error_traces_kept(exporter):
+    with tracing_service.root_span("con error"):
+        with pytest.raises(RuntimeError):
+            with tracing_service.span("falla"):
+                raise RuntimeError("boom")
+    assert exported_names(exporter) == ["con error", "falla"]
+
+
+def test_slow_traces_kept(exporter):
+    root = tracing_service._tracer.start_span("lenta", start_time=0)
+    root.end(end_time=int(settings.TRACING_TAIL_LATENCY_MS * 1e6))
+    assert exported_names(exporter) == ["lenta"]
+
+
+def test_spans_per_trace_capped(exporter, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_MAX_SPANS_PER_TRACE", 3)
+    monkeypatch.setattr(settings, "TRACING_TAIL_KEEP_RATIO", 1.0)
+    with tracing_service.root_span("raíz"):
+        for index in range(5):
+            with tracing_service.span(f"hijo {index}"):
+                pass
+    # Se guardan los primeros hijos y, aunque se haya llegado al tope, la raíz.
+    assert exported_names(exporter) == ["hijo 0", "hijo 1", "hijo 2", "raíz"]
+
+
+def http_scope(path="/posts/123"):
+    return {"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""}
+
+
+async def test_middleware_opens_server_span(exporter, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_TAIL_KEEP_RATIO", 1.0)
+
+    class Route:
+        path = "/posts/{post_id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 503, "headers": []})
+
+    async def send(message):
+        pass
+
+    await TracingMiddleware(app)(http_scope(), None, send)
+    (server,) = exporter.get_finished_spans()
+    assert server.name == "GET /posts/{post_id}"
+    assert server.kind is trace.SpanKind.SERVER
+    assert server.attributes["http.response.status_code"] == 503
+    assert server.status.status_code is trace.StatusCode.ERROR
+
+
+async def test_middleware_skips_when_span_already_open(exporter, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_TAIL_KEEP_RATIO", 1.0)
+
+    async def app(scope, receive, send):
+        assert trace.get_current_span().name == "servidor"
+
+    with tracing_service.root_span("servidor"):
+        await TracingMiddleware(app)(http_scope(), None, None)
+    assert exported_names(exporter) == ["servidor"]